@@ -0,0 +1,533 @@
+"""
+Linear-algebra kernels for the ADMM x-update
+
+The LASSO x-update solves (A^T A + rho I) x = rhs at every iteration.
+A^T A never changes, only rho does, so the expensive part can be done
+once and reused no matter how often update_rho moves rho.
+
+Solvers (selected by name in make_x_solver):
+- "direct":   np.linalg.solve on AtA + rho I every call (reference path)
+- "eig":      one eigendecomposition of AtA, O(d^2) per solve for any rho
+- "chol":     Cholesky factor cached per distinct rho value
+- "woodbury": matrix inversion lemma in the m x m space of A A^T,
+              never forms the d x d Gram matrix (for m << d)
+- "cg":       warm-started conjugate gradient on x -> A^T (A x) + rho x,
+              only needs products with A (scipy.sparse designs, operators)
+- "orthogonal": closed form for operators with A A^T = row_scale * I
+              (partial orthonormal DCT / Fourier rows)
+- "circulant": closed form in the Fourier domain for square circulant A
+              (periodic convolution), O(d log d) per solve
+- "auto":     "cg" for scipy.sparse A or a matrix-free operator, else
+              "woodbury" when A has fewer rows than columns, else "direct"
+
+The d-space solvers ("direct", "eig", "chol") also run from a precomputed
+Gram matrix alone (make_x_solver(None, solver, AtA=AtA)), e.g. one
+streamed from disk by accumulate_gram.
+
+Matrix-free operators are any object with .shape, .matvec(v) and
+.rmatvec(v), e.g. scipy.sparse.linalg.LinearOperator; they are never
+materialized.
+
+Every solve(rhs, rho, out=None) can write into a caller-owned buffer;
+"eig" and dense "woodbury" then run without allocating. Every solver also
+has gram_matvec(v) = A^T A v, used for the duality gap.
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+# -----------------------------
+# Products with A
+# -----------------------------
+
+def is_operator(A):
+    return hasattr(A, "matvec") and hasattr(A, "rmatvec")
+
+
+def matvec(A, v):
+    return A.matvec(v) if is_operator(A) else A @ v
+
+
+def rmatvec(A, v):
+    return A.rmatvec(v) if is_operator(A) else A.T @ v
+
+
+def as_dtype(A, dtype):
+    # operators are used as given; arrays and sparse matrices are cast once
+    return A if is_operator(A) else A.astype(dtype, copy=False)
+
+
+def norm64(v):
+    # 2-norm accumulated in float64 whatever the working precision of v
+    if v.dtype == np.float64:
+        return float(np.linalg.norm(v))
+    return math.sqrt(float(np.einsum("i,i->", v, v, dtype=np.float64)))
+
+
+def row_norms64(W):
+    # 2-norms of all rows of W in one fused pass, accumulated in float64
+    return np.sqrt(np.einsum("ij,ij->i", W, W, dtype=np.float64))
+
+
+def _into(out, x):
+    if out is None:
+        return x
+    out[...] = x
+    return out
+
+
+def _scratch(solver, name, n, dtype):
+    buf = getattr(solver, name, None)
+    if buf is None or buf.dtype != dtype:
+        buf = np.empty(n, dtype=dtype)
+        setattr(solver, name, buf)
+    return buf
+
+
+# -----------------------------
+# Out-of-core Gram data
+# -----------------------------
+
+def load_rows(A):
+    # a .npy path is memory-mapped read-only; arrays / memmaps pass through
+    return np.load(A, mmap_mode="r") if isinstance(A, (str, bytes)) or hasattr(A, "__fspath__") else A
+
+
+def accumulate_gram(A, b, chunk_rows=None, chunk_bytes=64 << 20, dtype=np.float64):
+    """
+    Return (AtA, Atb, btb) of a row-major A that may not fit in memory.
+
+    A and b may be np.memmap arrays or .npy paths; rows are streamed in
+    chunks of chunk_rows (default: as many as fit in chunk_bytes), so only
+    one chunk plus the d x d result is ever resident. Sums run in dtype.
+    """
+    A, b = load_rows(A), load_rows(b)
+    m, d = A.shape
+    if chunk_rows is None:
+        chunk_rows = max(1, chunk_bytes // (d * np.dtype(dtype).itemsize))
+
+    AtA = np.zeros((d, d), dtype)
+    Atb = np.zeros(d, dtype)
+    btb = 0.0
+    for start in range(0, m, chunk_rows):
+        Ac = np.asarray(A[start:start + chunk_rows], dtype=dtype)
+        bc = np.asarray(b[start:start + chunk_rows], dtype=dtype)
+        AtA += Ac.T @ Ac
+        Atb += Ac.T @ bc
+        btb += float(bc @ bc)
+    return AtA, Atb, btb
+
+
+# -----------------------------
+# x-update solvers
+# -----------------------------
+
+class DirectSolver:
+    def __init__(self, A, AtA=None):
+        self.AtA = A.T @ A if AtA is None else AtA
+        self.I = np.eye(self.AtA.shape[0], dtype=self.AtA.dtype)
+
+    def solve(self, rhs, rho, out=None):
+        return _into(out, np.linalg.solve(self.AtA + rho * self.I, rhs))
+
+    def gram_matvec(self, v):
+        return self.AtA @ v
+
+
+class EigSolver:
+    def __init__(self, A, AtA=None):
+        if AtA is None:
+            AtA = A.T @ A
+        # AtA = V diag(w) V^T, so (AtA + rho I)^{-1} = V diag(1 / (w + rho)) V^T
+        self.w, self.V = np.linalg.eigh(AtA)
+
+    def solve(self, rhs, rho, out=None):
+        if out is None:
+            return self.V @ ((self.V.T @ rhs) / (self.w + rho))
+
+        coef = _scratch(self, "_coef", self.w.shape[0], rhs.dtype)
+        den = _scratch(self, "_den", self.w.shape[0], rhs.dtype)
+        np.dot(self.V.T, rhs, out=coef)
+        np.add(self.w, rho, out=den)
+        coef /= den
+        return np.dot(self.V, coef, out=out)
+
+    def gram_matvec(self, v):
+        return self.V @ (self.w * (self.V.T @ v))
+
+
+class CholeskySolver:
+    def __init__(self, A, AtA=None, max_cached=8):
+        self.AtA = A.T @ A if AtA is None else AtA
+        self.I = np.eye(self.AtA.shape[0], dtype=self.AtA.dtype)
+        self.max_cached = max_cached
+        self._factors = OrderedDict()
+
+    def _factor(self, rho):
+        from scipy.linalg import cho_factor
+
+        key = float(rho)
+        if key in self._factors:
+            self._factors.move_to_end(key)
+            return self._factors[key]
+
+        factor = cho_factor(self.AtA + key * self.I)
+        self._factors[key] = factor
+        if len(self._factors) > self.max_cached:
+            self._factors.popitem(last=False)
+        return factor
+
+    def solve(self, rhs, rho, out=None):
+        from scipy.linalg import cho_solve
+
+        return _into(out, cho_solve(self._factor(rho), rhs))
+
+    def gram_matvec(self, v):
+        return self.AtA @ v
+
+
+class WoodburySolver:
+    def __init__(self, A, AtA=None):
+        # (A^T A + rho I)^{-1} = (I - A^T (rho I + A A^T)^{-1} A) / rho,
+        # with A A^T = U diag(w) U^T factored once in the small m x m space
+        self.A = A
+        self.w, self.U = np.linalg.eigh(A @ A.T)
+
+    def solve(self, rhs, rho, out=None):
+        if out is None or not isinstance(self.A, np.ndarray):
+            t = self.U @ ((self.U.T @ (self.A @ rhs)) / (self.w + rho))
+            return _into(out, (rhs - self.A.T @ t) / rho)
+
+        m = self.w.shape[0]
+        Av = _scratch(self, "_Av", m, rhs.dtype)
+        coef = _scratch(self, "_coef", m, rhs.dtype)
+        den = _scratch(self, "_den", m, rhs.dtype)
+        np.dot(self.A, rhs, out=Av)
+        np.dot(self.U.T, Av, out=coef)
+        np.add(self.w, rho, out=den)
+        coef /= den
+        np.dot(self.U, coef, out=Av)
+        np.dot(self.A.T, Av, out=out)
+        np.subtract(rhs, out, out=out)
+        out /= rho
+        return out
+
+    def gram_matvec(self, v):
+        return rmatvec(self.A, matvec(self.A, v))
+
+
+class CGSolver:
+    def __init__(self, A, AtA=None, tol=1e-2, tol_decay=0.7, tol_min=1e-10, tol_schedule=None, maxiter=None):
+        # Inner relative tolerance for the j-th solve: tol_schedule(j) if given,
+        # else max(tol_min, tol * tol_decay**j). Loose early solves are cheap
+        # and the warm start from the previous x keeps later ones short.
+        self.A = A
+        self.tol = tol
+        self.tol_decay = tol_decay
+        self.tol_min = tol_min
+        self.tol_schedule = tol_schedule
+        self.maxiter = maxiter
+        self.n_solves = 0
+        self.x0 = None
+
+    def inner_tol(self, j):
+        if self.tol_schedule is not None:
+            return self.tol_schedule(j)
+        return max(self.tol_min, self.tol * self.tol_decay ** j)
+
+    def solve(self, rhs, rho, out=None):
+        from scipy.sparse.linalg import LinearOperator, cg
+
+        d = rhs.shape[0]
+        op = LinearOperator((d, d), matvec=lambda v: rmatvec(self.A, matvec(self.A, v)) + rho * v, dtype=rhs.dtype)
+        x, _ = cg(op, rhs, x0=self.x0, rtol=self.inner_tol(self.n_solves), maxiter=self.maxiter)
+        self.n_solves += 1
+        self.x0 = x
+        return _into(out, x)
+
+    def gram_matvec(self, v):
+        return rmatvec(self.A, matvec(self.A, v))
+
+
+class OrthogonalRowsSolver:
+    def __init__(self, A, AtA=None, row_scale=1.0):
+        # A A^T = row_scale * I turns the Woodbury form into
+        # (A^T A + rho I)^{-1} v = (v - A^T A v / (rho + row_scale)) / rho
+        self.A = A
+        self.row_scale = row_scale
+
+    def solve(self, rhs, rho, out=None):
+        return _into(out, (rhs - rmatvec(self.A, matvec(self.A, rhs)) / (rho + self.row_scale)) / rho)
+
+    def gram_matvec(self, v):
+        return rmatvec(self.A, matvec(self.A, v))
+
+
+class CirculantSolver:
+    def __init__(self, A, AtA=None):
+        # A = F^H diag(lam) F with lam = fft of its first column, so
+        # A^T A + rho I is diagonal in the Fourier domain
+        m, d = A.shape
+        if m != d:
+            raise ValueError(f"circulant solver needs a square operator, got shape {A.shape}")
+        e0 = np.zeros(d)
+        e0[0] = 1.0
+        self.gain = np.abs(np.fft.rfft(matvec(A, e0))) ** 2
+        self.d = d
+
+    def solve(self, rhs, rho, out=None):
+        return _into(out, np.fft.irfft(np.fft.rfft(rhs) / (self.gain + rho), n=self.d))
+
+    def gram_matvec(self, v):
+        return np.fft.irfft(np.fft.rfft(v) * self.gain, n=self.d)
+
+
+SOLVERS = {
+    "direct": DirectSolver,
+    "eig": EigSolver,
+    "chol": CholeskySolver,
+    "woodbury": WoodburySolver,
+    "cg": CGSolver,
+    "orthogonal": OrthogonalRowsSolver,
+    "circulant": CirculantSolver,
+}
+
+
+def _is_sparse(A):
+    try:
+        from scipy.sparse import issparse
+    except ImportError:
+        return False
+    return issparse(A)
+
+
+def resolve_solver(A, solver="auto"):
+    if solver == "auto":
+        if A is None:  # Gram data only
+            return "eig"
+        if _is_sparse(A) or is_operator(A):
+            return "cg"
+        m, d = A.shape
+        return "woodbury" if m < d else "direct"
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown x-update solver {solver!r}; expected one of {sorted(SOLVERS)} or 'auto'")
+    return solver
+
+
+GRAM_SOLVERS = ("eig", "chol", "direct")
+
+
+def resolve_gram_solver(solver="auto"):
+    # solvers that work from A^T A alone (A=None)
+    name = resolve_solver(None, solver)
+    if name not in GRAM_SOLVERS:
+        raise ValueError(f"x-update solver {name!r} needs A; with Gram data only use one of {GRAM_SOLVERS} or 'auto'")
+    return name
+
+
+def make_x_solver(A, solver="auto", AtA=None, **options):
+    # options go to the solver constructor (e.g. tol / tol_schedule for "cg")
+    name = resolve_solver(A, solver) if A is not None else resolve_gram_solver(solver)
+    return SOLVERS[name](A, AtA=AtA, **options)
+
+
+# -----------------------------
+# Acceleration
+# -----------------------------
+
+class FastRestart:
+    """
+    Momentum for restarted fast ADMM (Goldstein, O'Donoghue, Setzer &
+    Baraniuk): the next x-update reads the extrapolated z_hat, y_hat.
+
+    Call begin(z, y) before an iteration and step(z, y, c, rho_changed)
+    after it, with c = ||y - y_hat||^2 / rho + rho ||z - z_hat||^2. A step
+    that does not shrink c by eta restarts from the previous iterate, and
+    any change of rho drops the momentum.
+    """
+
+    def __init__(self, z, y, eta=0.999):
+        self.z_hat, self.y_hat = z.copy(), y.copy()
+        self.z_prev, self.y_prev = z.copy(), y.copy()
+        self.eta = eta
+        self.a = 1.0
+        self.c = math.inf
+        self.n_restarts = 0
+
+    def begin(self, z, y):
+        np.copyto(self.z_prev, z)
+        np.copyto(self.y_prev, y)
+
+    def step(self, z, y, c, rho_changed=False):
+        if rho_changed:
+            self.a, self.c = 1.0, math.inf
+            np.copyto(self.z_hat, z)
+            np.copyto(self.y_hat, y)
+        elif c < self.eta * self.c:
+            a_next = (1.0 + math.sqrt(1.0 + 4.0 * self.a * self.a)) / 2.0
+            beta = (self.a - 1.0) / a_next
+            for hat, cur, prev in ((self.z_hat, z, self.z_prev), (self.y_hat, y, self.y_prev)):
+                np.subtract(cur, prev, out=hat)  # hat = cur + beta (cur - prev)
+                hat *= beta
+                hat += cur
+            self.a, self.c = a_next, c
+        else:
+            self.n_restarts += 1
+            self.a, self.c = 1.0, self.c / self.eta
+            np.copyto(self.z_hat, self.z_prev)
+            np.copyto(self.y_hat, self.y_prev)
+
+
+class AndersonMixer:
+    """
+    Type-II Anderson acceleration of a fixed-point map w -> T(w).
+
+    Keeps the last m differences of T-values and residuals f = T(w) - w in
+    a ring buffer. mix(g, f) records g = T(w_k), f and overwrites g with
+    g - dG gamma, where gamma solves the (Tikhonov-regularized) least
+    squares min ||f - dF gamma||. Returns False (g left as the plain step)
+    while the buffer is empty or the solve is not finite. reset() clears
+    the memory, e.g. when the map itself changes.
+    """
+
+    def __init__(self, n, m=5, reg=1e-10, dtype=np.float64):
+        self.m = m
+        self.reg = reg
+        self.dG = np.empty((m, n), dtype)
+        self.dF = np.empty((m, n), dtype)
+        self.g_prev = np.empty(n, dtype)
+        self.f_prev = np.empty(n, dtype)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.head = 0
+        self.has_prev = False
+
+    def mix(self, g, f):
+        if self.has_prev:
+            np.subtract(g, self.g_prev, out=self.dG[self.head])
+            np.subtract(f, self.f_prev, out=self.dF[self.head])
+            self.head = (self.head + 1) % self.m
+            self.count = min(self.count + 1, self.m)
+        np.copyto(self.g_prev, g)
+        np.copyto(self.f_prev, f)
+        self.has_prev = True
+        if self.count == 0:
+            return False
+
+        dF, dG = self.dF[:self.count], self.dG[:self.count]
+        M = dF @ dF.T
+        M[np.diag_indices_from(M)] += self.reg * max(np.trace(M), np.finfo(M.dtype).tiny)
+        try:
+            gamma = np.linalg.solve(M, dF @ f)
+        except np.linalg.LinAlgError:
+            return False
+        if not np.all(np.isfinite(gamma)):
+            return False
+        g -= gamma @ dG
+        return True
+
+
+# -----------------------------
+# Stopping rule
+# -----------------------------
+
+class BoydStopping:
+    """
+    Boyd primal/dual stopping rule on a (5, d) state block W = [x, z, y, r, s].
+
+    With check_every=1 all five norms are taken in one fused pass every
+    iteration. With check_every=N the norms of x, z, y are only recomputed
+    every N iterations; in between they are bounded from the last exact
+    values via ||z_k - z_{k-1}|| = s_k / rho_k, ||y_k - y_{k-1}|| = rho_k r_k
+    and x_k = z_k + r_k (with over-relaxation alpha = relax the y step is
+    bounded by rho alpha r_k + |1 - alpha| s_k). Iterations whose residuals exceed the bounded
+    tolerances cannot stop; any other iteration gets an exact check, so the
+    stopping iteration is the same as with check_every=1.
+
+    n overrides the dimension of the absolute tolerance sqrt(n) abstol, for
+    rows that hold a reduced subvector of a longer (zero-padded) state.
+    """
+
+    def __init__(self, W, abstol=1e-4, reltol=1e-3, check_every=1, rho_floor=0.0, relax=1.0, n=None):
+        self.W = W
+        self.relax = relax
+        self.base = np.sqrt(W.shape[1] if n is None else n) * abstol
+        self.reltol = reltol
+        self.check_every = check_every
+        self.rho_floor = rho_floor
+        self.anchor_k = -1
+        _, self.nz, self.ny = row_norms64(W[:3])
+
+    def check(self, k, rho):
+        """Return (r_norm, s_norm, converged) for iteration k run with rho."""
+        rho_div = max(rho, self.rho_floor)
+        if k - self.anchor_k >= self.check_every:
+            nx, nz, ny, r_norm, s_norm = row_norms64(self.W)
+        else:
+            r_norm, s_norm = row_norms64(self.W[3:5])
+            nz = self.nz + s_norm / rho
+            ny = self.ny + rho * self.relax * r_norm + abs(1.0 - self.relax) * s_norm
+            slack = 1.0 + 1e-12  # keep the bounds safe against rounding
+            eps_pri = self.base + self.reltol * max(nz + r_norm, nz) * slack
+            eps_dual = self.base + self.reltol * (ny / rho_div) * slack
+            if r_norm > eps_pri or s_norm > eps_dual:
+                self.nz, self.ny = nz, ny
+                return float(r_norm), float(s_norm), False
+            nx, nz, ny = row_norms64(self.W[:3])
+
+        self.anchor_k, self.nz, self.ny = k, nz, ny
+        eps_pri = self.base + self.reltol * max(nx, nz)
+        eps_dual = self.base + self.reltol * (ny / rho_div)
+        return float(r_norm), float(s_norm), bool(r_norm <= eps_pri and s_norm <= eps_dual)
+
+
+def lasso_duality_gap(z, Atb, g, btb, lam, g_inf=None):
+    """
+    Duality gap of 1/2 ||A z - b||^2 + lam ||z||_1 from Gram quantities.
+
+    g = A^T (b - A z) = Atb - A^T A z; g_inf is ||g||_inf over all features
+    (defaults to g itself). The dual point is the scaled residual
+    theta = alpha (b - A z), alpha = 1 / max(lam, g_inf).
+    Returns (gap, alpha).
+    """
+    if g_inf is None:
+        g_inf = float(np.max(np.abs(g)))
+    alpha = 1.0 / max(lam, g_inf)
+    rb = btb - float(z @ Atb)  # (b - A z)^T b
+    rr = max(rb - float(z @ g), 0.0)  # ||b - A z||^2
+    primal = 0.5 * rr + lam * float(np.abs(z).sum())
+    dual = lam * alpha * rb - 0.5 * (lam * alpha) ** 2 * rr
+    return max(primal - dual, 0.0), alpha
+
+
+class GapStopping:
+    """
+    Certified stopping rule: converged once the LASSO duality gap at the
+    z-iterate is at most gap_tol (objective units).
+
+    The gap costs one A^T A product (xsolver.gram_matvec), so it is only
+    evaluated every `every` iterations; it is accumulated in float64.
+    """
+
+    def __init__(self, xsolver, Atb, btb, lam, gap_tol, every=10):
+        self.xsolver = xsolver
+        self.Atb = np.asarray(Atb, dtype=np.float64)
+        self.btb = float(btb)
+        self.lam = lam
+        self.gap_tol = gap_tol
+        self.every = every
+        self.gap = np.inf
+
+    def check(self, k, z):
+        """Return (gap, converged); gap is the last evaluated value."""
+        if (k + 1) % self.every:
+            return self.gap, False
+        z = np.asarray(z, dtype=np.float64)
+        g = self.Atb - np.asarray(self.xsolver.gram_matvec(z), dtype=np.float64)
+        self.gap, _ = lasso_duality_gap(z, self.Atb, g, self.btb, self.lam)
+        return self.gap, bool(self.gap <= self.gap_tol)
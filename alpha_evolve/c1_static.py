@@ -0,0 +1,394 @@
+"""
+Static Condition C1 pre-check for evolved update_rho programs
+
+A local, deterministic AST / dataflow pass over the candidate source that
+catches the clear-cut violations of the requirements R1-R7 the LLM checker
+enforces (see translate_LLM.build_prompt_check_code), before any network
+call:
+
+- R2: an update factor 1 + T whose T is not summable (behaves like k^-q
+      with q <= 1, or constant), inline or through a helper called with k
+- R5: an update factor rho * F / rho / F whose value depends on the
+      residuals (selecting between branches on them is allowed)
+- R6: min / max / clip applied to rho or new_rho, or new_rho bounded
+      conditionally on its own value
+- R7: randomness in the update
+
+Statements guarded by an early-iteration test (if k < K0: ...) are exempt,
+as the eventual requirements allow finitely many violations; K0 may be a
+literal, a module-level constant or an update_rho default, and a test of k
+against anything else gives no verdict on its branch. The pass only
+reports what it can prove from the syntax; forms it does not recognize
+(conditional expressions, in-place updates, other factor shapes, ...) are
+left to the LLM checker.
+
+check_c1(code) returns (is_valid, issues) where issues are lines in the
+shape of the LLM checker report, e.g. "R6: Violated. ...".
+"""
+
+import ast
+
+
+CLIP_FUNCS = {"min", "max", "clip", "minimum", "maximum", "fmin", "fmax"}
+MATH_FUNCS = {"sqrt": 0.5, "cbrt": 1.0 / 3.0}
+
+
+# -----------------------------
+# Function bodies
+# -----------------------------
+
+class _Body:
+    """Assignments and returns of one function, with the if-guards around them."""
+
+    def __init__(self, func):
+        self.func = func
+        self.params = [a.arg for a in func.args.args]
+        defaults = func.args.defaults
+        self.defaults = dict(zip(self.params[len(self.params) - len(defaults):], defaults))
+        self.assigns = []  # (name, value, guards, lineno)
+        self.returns = []  # (value, guards, lineno)
+        self._walk(func.body, [])
+
+    def _walk(self, stmts, guards):
+        for stmt in stmts:
+            if isinstance(stmt, ast.Assign):
+                for target in stmt.targets:
+                    for node in ast.walk(target):
+                        if isinstance(node, ast.Name):
+                            self.assigns.append((node.id, stmt.value, guards, stmt.lineno))
+            elif isinstance(stmt, (ast.AugAssign, ast.AnnAssign)) and isinstance(stmt.target, ast.Name):
+                if stmt.value is not None:
+                    value = stmt.value
+                    if isinstance(stmt, ast.AugAssign):
+                        value = ast.BinOp(left=ast.Name(id=stmt.target.id, ctx=ast.Load()), op=stmt.op, right=stmt.value)
+                    self.assigns.append((stmt.target.id, value, guards, stmt.lineno))
+            elif isinstance(stmt, ast.Return) and stmt.value is not None:
+                self.returns.append((stmt.value, guards, stmt.lineno))
+            elif isinstance(stmt, ast.If):
+                self._walk(stmt.body, guards + [(stmt.test, True)])
+                self._walk(stmt.orelse, guards + [(stmt.test, False)])
+            elif isinstance(stmt, (ast.For, ast.While, ast.With, ast.Try)):
+                for field in ("body", "orelse", "finalbody"):
+                    self._walk(getattr(stmt, field, []), guards)
+                for handler in getattr(stmt, "handlers", []):
+                    self._walk(handler.body, guards)
+
+    def defs(self, name):
+        return [(value, guards, lineno) for target, value, guards, lineno in self.assigns if target == name]
+
+
+def _names(node):
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+
+def _value_names(node):
+    # names that feed the value of node; comparisons only select a branch
+    if isinstance(node, ast.Compare):
+        return set()
+    if isinstance(node, ast.IfExp):
+        return _value_names(node.body) | _value_names(node.orelse)
+    if isinstance(node, ast.Name):
+        return {node.id}
+    return set().union(set(), *(_value_names(child) for child in ast.iter_child_nodes(node)))
+
+
+def _call_name(call):
+    func = call.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def _number(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _number(node.operand)
+        return None if value is None else -value
+    return None
+
+
+def _early_only(guards, k, consts):
+    # True if some enclosing test restricts the branch to k below a constant,
+    # or compares k with a bound that does not resolve to a number (no
+    # verdict on such branches)
+    for test, branch in guards:
+        clauses = test.values if isinstance(test, ast.BoolOp) and isinstance(test.op, ast.And) and branch else [test]
+        for clause in clauses:
+            if not (isinstance(clause, ast.Compare) and len(clause.ops) == 1):
+                continue
+            left, op, right = clause.left, clause.ops[0], clause.comparators[0]
+            if isinstance(right, ast.Name) and right.id == k:
+                bound = left
+                op = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE}.get(type(op), type(op))()
+            elif isinstance(left, ast.Name) and left.id == k:
+                bound = right
+            else:
+                continue
+            if _value(bound, consts) is None:
+                return True
+            if branch and isinstance(op, (ast.Lt, ast.LtE)):
+                return True
+            if not branch and isinstance(op, (ast.Gt, ast.GtE)):
+                return True
+    return False
+
+
+# -----------------------------
+# Taint
+# -----------------------------
+
+def _taint(body, sources):
+    # name -> set of source labels, propagated through assignments to a fixpoint
+    taint = {name: {label} for name, label in sources.items()}
+    changed = True
+    while changed:
+        changed = False
+        for name, value, _, _ in body.assigns:
+            labels = set().union(set(), *(taint.get(n, set()) for n in _value_names(value)))
+            if not labels <= taint.get(name, set()):
+                taint.setdefault(name, set()).update(labels)
+                changed = True
+    return taint
+
+
+def _expr_taint(node, taint):
+    return set().union(set(), *(taint.get(n, set()) for n in _value_names(node)))
+
+
+# -----------------------------
+# Summability of tau
+# -----------------------------
+
+def _growth(node, k, consts):
+    """Degree g with node ~ k^g as k -> inf (-inf for geometric decay), None if unknown."""
+    if _number(node) is not None:
+        return 0.0 if _number(node) != 0 else float("-inf")
+    if isinstance(node, ast.Name):
+        if node.id == k:
+            return 1.0
+        return 0.0 if node.id in consts else None
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        return _growth(node.operand, k, consts)
+    if isinstance(node, ast.BinOp):
+        left, right = _growth(node.left, k, consts), _growth(node.right, k, consts)
+        if isinstance(node.op, ast.Pow):
+            exponent = _value(node.right, consts)
+            if left is not None and exponent is not None:
+                return left * exponent
+            base = _value(node.left, consts)
+            if base is not None and right == 1.0 and 0 <= base < 1:  # q ** k
+                return float("-inf")
+            return None
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            return max(left, right)
+        if isinstance(node.op, ast.Mult):
+            return left + right
+        if isinstance(node.op, ast.Div):
+            return left - right
+        return None
+    if isinstance(node, ast.Call) and len(node.args) == 1:
+        name = _call_name(node)
+        inner = _growth(node.args[0], k, consts)
+        if inner is None:
+            return None
+        if name in MATH_FUNCS:
+            return inner * MATH_FUNCS[name]
+        if name == "exp" and inner > 0 and _leading_sign(node.args[0]) < 0:
+            return float("-inf")
+        if name in ("float", "abs"):
+            return inner
+    return None
+
+
+def _leading_sign(node):
+    # sign of an expression like -a * k or -(k + 1) (used for exp(-a k))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_leading_sign(node.operand)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+        return _leading_sign(node.left) * _leading_sign(node.right)
+    value = _number(node)
+    if value is not None and value < 0:
+        return -1
+    return 1
+
+
+def _value(node, consts):
+    if _number(node) is not None:
+        return _number(node)
+    if isinstance(node, ast.Name) and node.id in consts:
+        return consts[node.id]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _value(node.operand, consts)
+        return None if value is None else -value
+    return None
+
+
+def _module_consts(tree):
+    # top-level names bound exactly once, by a plain numeric assignment
+    stores = {}
+    for stmt in tree.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                stores[node.id] = stores.get(node.id, 0) + 1
+    consts = {}
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            name = stmt.targets[0].id
+            if stores[name] == 1 and _number(stmt.value) is not None:
+                consts[name] = _number(stmt.value)
+    return consts
+
+
+def _scope_consts(body, outer):
+    # constants seen inside a function: outer ones it does not rebind, and
+    # numeric parameter defaults (parameters shadow outer names)
+    local = {target for target, _, _, _ in body.assigns} | set(body.params)
+    consts = {name: value for name, value in outer.items() if name not in local}
+    for name, default in body.defaults.items():
+        if _number(default) is not None and name not in {target for target, _, _, _ in body.assigns}:
+            consts[name] = _number(default)
+    return consts
+
+
+def _tau_summability(tau, call, update, consts, module_consts):
+    """
+    Worst growth degree of the eventual returns of helper tau at call, None
+    if unknown. consts are the constants of update_rho's scope, used to
+    resolve the call's arguments; module_consts those the helper sees.
+    """
+    if any(isinstance(arg, ast.Starred) for arg in call.args) or any(kw.arg is None for kw in call.keywords):
+        return None
+    tau_consts = _scope_consts(tau, module_consts)
+    k = None
+    passed = list(zip(tau.params, call.args)) + [(kw.arg, kw.value) for kw in call.keywords]
+    for name, arg in passed:
+        if name not in tau.params or name in {target for target, _, _, _ in tau.assigns}:
+            return None
+        if isinstance(arg, ast.Name) and arg.id == update.params[1]:
+            k = name
+            continue
+        value = _value(arg, consts)
+        if value is None:
+            tau_consts.pop(name, None)  # an argument we cannot resolve: no default stands in for it
+        else:
+            tau_consts[name] = value
+    if k is None:
+        return None
+    tau_consts.pop(k, None)
+
+    worst = None
+    for value, guards, _ in tau.returns:
+        if _early_only(guards, k, tau_consts):
+            continue
+        g = _growth(value, k, tau_consts)
+        if g is None:
+            return None
+        worst = g if worst is None else max(worst, g)
+    return worst
+
+
+# -----------------------------
+# Checker
+# -----------------------------
+
+def check_c1(code):
+    """Return (is_valid, issues); issues are "Rk: Violated. ..." lines."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return True, []
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    module_consts = _module_consts(tree)
+    if "update_rho" not in functions or len(functions["update_rho"].args.args) < 4:
+        return True, []
+
+    update = _Body(functions["update_rho"])
+    rho, k, r_norm, s_norm = update.params[:4]
+    taint = _taint(update, {rho: "rho", r_norm: "residual", s_norm: "residual"})
+    consts = _scope_consts(update, module_consts)
+    found = {}
+
+    def report(req, message, lineno):
+        lines = found.setdefault(req, {}).setdefault(message, [])
+        if lineno not in lines:
+            lines.append(lineno)
+
+    def eventual_defs(name):
+        return [(value, lineno) for value, guards, lineno in update.defs(name) if not _early_only(guards, k, consts)]
+
+    # R7: randomness
+    for node in ast.walk(update.func):
+        if isinstance(node, ast.Attribute) and node.attr == "random" or isinstance(node, ast.Name) and node.id == "random":
+            report(7, "the update uses random numbers", node.lineno)
+            break
+
+    def check_tau(term, lineno, seen):
+        # R2 for the T of a factor 1 + T; no verdict unless every form is recognized
+        if isinstance(term, ast.Name) and term.id not in consts and term.id != k:
+            if term.id in seen:
+                return
+            for value, ln in eventual_defs(term.id):
+                check_tau(value, ln, seen + (term.id,))
+            return
+        if isinstance(term, ast.Call) and _call_name(term) in functions and _call_name(term) != "update_rho":
+            name = _call_name(term)
+            g = _tau_summability(_Body(functions[name]), term, update, consts, module_consts)
+            where = functions[name].lineno
+        else:
+            name, g, where = "tau_k", _growth(term, k, consts), lineno
+        if g is not None and g >= -1.0:
+            report(2, f"{name} behaves like k^{g:g}, which is not summable", where)
+
+    def check_factor(factor, lineno, seen=()):
+        if "residual" in _expr_taint(factor, taint):
+            report(5, "the update factor depends on the residuals", lineno)
+            return
+        if isinstance(factor, ast.Name) and factor.id not in seen:
+            for value, ln in eventual_defs(factor.id):
+                check_factor(value, ln, seen + (factor.id,))
+            return
+        if isinstance(factor, ast.BinOp) and isinstance(factor.op, ast.Add):
+            if _number(factor.left) == 1.0:
+                check_tau(factor.right, lineno, seen)
+            elif _number(factor.right) == 1.0:
+                check_tau(factor.left, lineno, seen)
+
+    def check_update(value, target, guards, lineno):
+        if _early_only(guards, k, consts):
+            return
+        if target is not None and any(target in _names(test) for test, _ in guards):
+            report(6, f"{target} is bounded conditionally on its own value", lineno)
+            return
+        for node in ast.walk(value):
+            if isinstance(node, ast.Call) and _call_name(node) in CLIP_FUNCS and \
+                    (target in _value_names(node) or "rho" in _expr_taint(node, taint)):
+                report(6, "rho is post-processed with min / max / clip", lineno)
+                return
+        if isinstance(value, ast.BinOp) and isinstance(value.op, (ast.Mult, ast.Div)):
+            if isinstance(value.left, ast.Name) and value.left.id == rho:
+                check_factor(value.right, lineno)
+            elif isinstance(value.op, ast.Mult) and isinstance(value.right, ast.Name) and value.right.id == rho:
+                check_factor(value.left, lineno)
+
+    # every way the first returned value can be formed
+    for value, guards, lineno in update.returns:
+        first = value.elts[0] if isinstance(value, ast.Tuple) and value.elts else value
+        if isinstance(first, ast.Name) and first.id != rho:
+            for rhs, def_guards, def_line in update.defs(first.id):
+                check_update(rhs, first.id, def_guards, def_line)
+        else:
+            check_update(first, None, guards, lineno)
+
+    issues = []
+    for req in sorted(found):
+        parts = [f"{message} ({'line' if len(lines) == 1 else 'lines'} {', '.join(map(str, lines))})"
+                 for message, lines in found[req].items()]
+        issues.append(f"R{req}: Violated. " + "; ".join(parts) + ".")
+    return not issues, issues
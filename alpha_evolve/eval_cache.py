@@ -0,0 +1,192 @@
+"""
+Content-addressed cache of evaluator results
+
+Candidates are keyed by the normalized AST of update_rho (and
+update_rho_vec, if defined) together with every module-level helper,
+constant and import they reach, directly or transitively (a definition
+inside a top-level if / try / with / for block brings in the whole block). Comments,
+docstrings and formatting do not survive parsing, so resubmissions of the
+same logic hit the cache; anything update_rho cannot reach (e.g. a
+__main__ demo) does not affect the key.
+
+behavior_fingerprint hashes the rounded outputs of the vectorized update
+rule over a fixed probe grid of (rho, k, r_norm, s_norm). Rules that
+differ only between probe points (a ratio threshold of 3 vs 10, a warm-up
+cutoff at k = 7) share a fingerprint, so it labels likely duplicates and
+is never used as a cache key.
+
+Entries live in one SQLite file and are evicted least-recently-used once
+there are more than max_entries of them.
+"""
+
+import ast
+import copy
+import contextlib
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+
+ROOTS = ("update_rho", "update_rho_vec")
+
+
+# -----------------------------
+# Program key
+# -----------------------------
+
+def _defined_names(stmt):
+    if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [stmt.name]
+    if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+        return [(alias.asname or alias.name).split(".")[0] for alias in stmt.names]
+    if isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+        targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+        return [node.id for target in targets for node in ast.walk(target) if isinstance(node, ast.Name)]
+    # compound statements (if / try / with / for / while) define whatever
+    # their blocks, loop targets and with-targets define
+    names = []
+    for target in [getattr(stmt, "target", None)] + [item.optional_vars for item in getattr(stmt, "items", [])]:
+        if target is not None:
+            names += [node.id for node in ast.walk(target) if isinstance(node, ast.Name)]
+    for field in ("body", "orelse", "finalbody", "handlers"):
+        for child in getattr(stmt, field, []):
+            if isinstance(child, ast.ExceptHandler):
+                names += [child.name] if child.name else []
+                names += [name for grandchild in child.body for name in _defined_names(grandchild)]
+            else:
+                names += _defined_names(child)
+    return names
+
+
+def _strip_docstrings(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+    return tree
+
+
+def normalized_source(code, roots=ROOTS):
+    """
+    Canonical text of the top-level statements reachable from `roots`
+    (source order, docstrings dropped, positions and formatting ignored).
+    """
+    tree = ast.parse(code)
+    defs = {}
+    for i, stmt in enumerate(tree.body):
+        for name in _defined_names(stmt):
+            defs.setdefault(name, []).append(i)
+
+    reached, todo = set(), [name for name in roots if name in defs]
+    while todo:
+        name = todo.pop()
+        for i in defs[name]:
+            if i in reached:
+                continue
+            reached.add(i)
+            for node in ast.walk(tree.body[i]):
+                if isinstance(node, ast.Name) and node.id in defs:
+                    todo.append(node.id)
+
+    stmts = [_strip_docstrings(copy.deepcopy(tree.body[i])) for i in sorted(reached)]
+    return "\n".join(ast.dump(stmt, annotate_fields=False) for stmt in stmts)
+
+
+def program_key(code, context=""):
+    """sha256 of the normalized program plus an evaluation-context string."""
+    payload = normalized_source(code) + "\0" + context
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# Behavioral fingerprint
+# -----------------------------
+
+PROBE_RHO = np.logspace(-3, 3, 7)
+PROBE_K = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 2000)
+PROBE_RESIDUALS = np.concatenate([[0.0], np.logspace(-8, 2, 6)])
+
+
+def behavior_fingerprint(update_rho_vec, mu=3.0, c=1.0, p=1.2, digits=9):
+    """
+    sha256 of an update rule's outputs on the probe grid.
+
+    update_rho_vec follows the evaluator's vectorized contract (arrays of
+    rho / r_norm / s_norm, scalar k). new_rho is hashed as the ratio
+    new_rho / rho rounded to `digits` significant digits, together with the
+    mode labels, so rules that only differ by floating-point reassociation
+    share a fingerprint. Returns None if the rule fails on the grid.
+    """
+    rho, r_norm, s_norm = (a.ravel() for a in np.meshgrid(PROBE_RHO, PROBE_RESIDUALS, PROBE_RESIDUALS, indexing="ij"))
+    h = hashlib.sha256()
+    try:
+        for k in PROBE_K:
+            new_rho, _, mode = update_rho_vec(rho.copy(), k, r_norm.copy(), s_norm.copy(), mu=mu, c=c, p=p)
+            ratio = np.asarray(new_rho, dtype=np.float64) / rho
+            ratio = np.where(np.isfinite(ratio), ratio, np.nan)
+            h.update(np.array([float(f"{v:.{digits - 1}e}") for v in ratio]).tobytes())
+            h.update("\0".join(str(m) for m in np.asarray(mode).ravel()).encode("utf-8"))
+    except Exception:
+        return None
+    return h.hexdigest()
+
+
+# -----------------------------
+# SQLite store
+# -----------------------------
+
+def _jsonable(obj):
+    # numpy scalars / arrays in metrics and artifacts
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+class EvalCache:
+    def __init__(self, path, max_entries=10000):
+        self.path = str(path)
+        self.max_entries = max_entries
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # one short transaction per call; sqlite serializes concurrent evaluators
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=_jsonable), time.time()),
+            )
+            db.execute(
+                "DELETE FROM entries WHERE key NOT IN "
+                "(SELECT key FROM entries ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
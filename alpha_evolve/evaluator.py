@@ -15,14 +15,21 @@ Set RICH_FEEDBACK=1 to enable detailed diagnostics
 
 import os
 import sys
+import json
 import time
 import traceback
 import importlib.util
 import numpy as np
-from alpha_evolve.translate_LLM import check_results_formulation, read_source_code, get_lean4_results
+from alpha_evolve.admm_linalg import BoydStopping, FastRestart, GapStopping, make_x_solver, norm64
+from alpha_evolve.c1_static import check_c1
+from alpha_evolve.eval_cache import EvalCache, behavior_fingerprint, program_key
+from alpha_evolve.translate_LLM import (LLMClient, check_math_form, get_lean4_results, get_math_form_from_code,
+                                        parse_check_result, read_source_code)
 from pathlib import Path
 import uuid
 import subprocess
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # optlib 项目根目录（lean_admm/alpha_evolve/ -> optlib/）
 _OPTLIB_ROOT = Path(__file__).resolve().parent.parent.parent
@@ -39,19 +46,72 @@ def write_unique_lean(code: str) -> Path:
 
 RICH_FEEDBACK = os.environ.get("RICH_FEEDBACK", "0") == "1"
 
+# Comma-separated seeds scored by evaluate(); more than one seed switches to
+# run_admm_batched (run_admm per seed under ADMM_ACCEL / ADMM_GAP_TOL) and
+# the score uses the mean iteration count
+EVAL_SEEDS = [int(seed) for seed in os.environ.get("EVAL_SEEDS", "0").split(",")]
+
+# x-update solver for run_admm: "auto", "direct", "eig", "chol", "woodbury" or "cg" (see admm_linalg)
+ADMM_SOLVER = os.environ.get("ADMM_SOLVER", "auto")
+
+# working precision of run_admm ("float64" or "float32"); convergence norms
+# are always accumulated in float64
+ADMM_DTYPE = os.environ.get("ADMM_DTYPE", "float64")
+
+# run_admm recomputes the x/z/y stopping norms only every N iterations
+# (iteration counts stay exact, see admm_linalg.BoydStopping)
+ADMM_CHECK_EVERY = int(os.environ.get("ADMM_CHECK_EVERY", "1"))
+
+# optional certified stop: run_admm also ends once the LASSO duality gap is
+# at most ADMM_GAP_TOL, evaluated every ADMM_GAP_EVERY iterations (unset = Boyd only)
+ADMM_GAP_TOL = float(os.environ["ADMM_GAP_TOL"]) if os.environ.get("ADMM_GAP_TOL") else None
+ADMM_GAP_EVERY = int(os.environ.get("ADMM_GAP_EVERY", "10"))
+
+# ADMM variant of run_admm: over-relaxation factor ADMM_RELAX (1 = plain,
+# typically 1.5-1.8) and ADMM_ACCEL=1 for restarted fast ADMM
+ADMM_RELAX = float(os.environ.get("ADMM_RELAX", "1.0"))
+ADMM_ACCEL = os.environ.get("ADMM_ACCEL", "0") == "1"
+
+# Stage order of evaluate(): "cascade" (numerics first, LLM / Lean only for
+# candidates that can still matter) or "concurrent" (all stages at once)
+EVAL_PIPELINE = os.environ.get("EVAL_PIPELINE", "cascade")
+
+# Cascade pruning: a converged candidate whose best possible score 1 / iters
+# cannot enter the top EVAL_TOPK scores seen so far skips the LLM / Lean
+# stages (0 disables pruning; default matches database.archive_size). Set
+# EVAL_SCOREBOARD to a JSON file to share the scores across evaluator processes.
+EVAL_TOPK = int(os.environ.get("EVAL_TOPK", "25"))
+EVAL_SCOREBOARD = os.environ.get("EVAL_SCOREBOARD")
+
+# Content-addressed result cache (see eval_cache): SQLite file EVAL_CACHE
+# ("off" disables), LRU-bounded to EVAL_CACHE_MAX_ENTRIES programs
+EVAL_CACHE = os.environ.get("EVAL_CACHE", str(Path(__file__).resolve().parent / "openevolve_output" / "eval_cache.sqlite"))
+EVAL_CACHE_MAX_ENTRIES = int(os.environ.get("EVAL_CACHE_MAX_ENTRIES", "10000"))
+
+# Local AST pre-check of Condition C1 (see c1_static): candidates with a
+# provable violation are rejected before the ADMM run and any LLM / Lean call
+C1_STATIC_CHECK = os.environ.get("C1_STATIC_CHECK", "1") == "1"
+
 
 # -----------------------------
 # Core ADMM components (fixed)
 # -----------------------------
 
-def soft(u, k):
-    return np.sign(u) * np.maximum(np.abs(u) - k, 0.0)
+def soft(u, k, out=None, tmp=None):
+    if out is None:
+        return np.sign(u) * np.maximum(np.abs(u) - k, 0.0)
+    # in-place variant: out must not alias u, tmp is scratch of u's shape
+    tmp = np.abs(u, out=tmp)
+    tmp -= k
+    np.maximum(tmp, 0.0, out=tmp)
+    np.sign(u, out=out)
+    out *= tmp
+    return out
 
 
-def run_admm(update_rho_fn, seed=0, max_iters=2000):
+def make_lasso_instance(seed=0, m=120, d=60):
     np.random.seed(seed)
 
-    m, d = 120, 60
     A = np.random.randn(m, d) / np.sqrt(m)
 
     x_true = np.zeros(d)
@@ -59,52 +119,96 @@ def run_admm(update_rho_fn, seed=0, max_iters=2000):
     x_true[supp] = np.random.randn(8)
     b = A @ x_true + 0.05 * np.random.randn(m)
 
+    return A, b
+
+
+def run_admm(update_rho_fn, seed=0, max_iters=2000, solver=None, dtype=None, check_every=None,
+             gap_tol=None, gap_every=None, relax=None, accel=None):
+    dtype = np.dtype(dtype or ADMM_DTYPE)
+    A, b = make_lasso_instance(seed)
+    A, b = A.astype(dtype, copy=False), b.astype(dtype, copy=False)
+    m, d = A.shape
+
     lam = 0.15
     rho = 0.5
 
-    x = np.zeros(d)
-    z = np.zeros(d)
-    y = np.zeros(d)
+    # x, z, y, r, s are rows of one block so the stopping norms are one pass
+    W = np.zeros((5, d), dtype)
+    x, z, y, r, s = W
 
-    AtA = A.T @ A
     Atb = A.T @ b
-    I = np.eye(d)
-
-    r_hist, s_hist, rho_hist = [], [], []
+    xsolver = make_x_solver(A, solver or ADMM_SOLVER)
+    relax = ADMM_RELAX if relax is None else relax
+    accel = ADMM_ACCEL if accel is None else accel
+    fast = FastRestart(z, y) if accel else None
+    zh, yh = (fast.z_hat, fast.y_hat) if accel else (z, y)  # points the x-update reads
+    check_every = 1 if accel else (check_every or ADMM_CHECK_EVERY)
+    stopping = BoydStopping(W, 1e-4, 1e-3, check_every=check_every, rho_floor=1e-12, relax=relax)
+    gap_tol = ADMM_GAP_TOL if gap_tol is None else gap_tol
+    gap_stopping = None
+    if gap_tol is not None:
+        gap_stopping = GapStopping(xsolver, Atb, float(b @ b), lam, gap_tol, every=gap_every or ADMM_GAP_EVERY)
+
+    # scratch buffers: the loop updates everything in place
+    rhs, u, tmp, z_old = np.empty(d, dtype), np.empty(d, dtype), np.empty(d, dtype), np.empty(d, dtype)
+    xh = x if relax == 1.0 else np.empty(d, dtype)
+    r_hist, s_hist, rho_hist = np.empty(max_iters), np.empty(max_iters), np.empty(max_iters)
+
+    # optional hooks of stateful rules (see rho_baselines)
+    if hasattr(update_rho_fn, "reset"):
+        update_rho_fn.reset()
+    observe = getattr(update_rho_fn, "observe", None)
 
     for k in range(max_iters):
-        x = np.linalg.solve(AtA + rho * I, Atb + rho * z - y)
-        z_old = z.copy()
-        z = soft(x + y / rho, lam / rho)
-
-        r = x - z
-        s = rho * (z - z_old)
-        y = y + rho * r
-
-        r_norm = float(np.linalg.norm(r))
-        s_norm = float(np.linalg.norm(s))
+        if fast is not None:
+            fast.begin(z, y)
+        np.multiply(zh, rho, out=rhs)  # rhs = Atb + rho * z - y
+        rhs += Atb
+        rhs -= yh
+        xsolver.solve(rhs, rho, out=x)
+        np.copyto(z_old, zh)
+        if relax != 1.0:  # xh = relax * x + (1 - relax) * z
+            np.multiply(z_old, 1.0 - relax, out=xh)
+            np.multiply(x, relax, out=tmp)
+            xh += tmp
+        np.divide(yh, rho, out=u)  # z = soft(xh + y / rho, lam / rho)
+        u += xh
+        soft(u, lam / rho, out=z, tmp=tmp)
+
+        np.subtract(x, z, out=r)
+        np.subtract(z, z_old, out=s)
+        s *= rho
+        np.subtract(xh, z, out=tmp)  # y = y + rho * (xh - z)
+        tmp *= rho
+        if fast is not None:
+            np.add(yh, tmp, out=y)
+        else:
+            y += tmp
 
-        r_hist.append(r_norm)
-        s_hist.append(s_norm)
-        rho_hist.append(rho)
+        r_norm, s_norm, converged = stopping.check(k, rho)
+        if gap_stopping is not None and not converged:
+            _, converged = gap_stopping.check(k, z)
 
-        eps_pri = np.sqrt(d) * 1e-4 + 1e-3 * max(
-            np.linalg.norm(x), np.linalg.norm(z)
-        )
-        eps_dual = np.sqrt(d) * 1e-4 + 1e-3 * (np.linalg.norm(y) / max(rho, 1e-12))
+        r_hist[k] = r_norm
+        s_hist[k] = s_norm
+        rho_hist[k] = rho
 
-        if r_norm <= eps_pri and s_norm <= eps_dual:
+        if converged:
             return {
                 "converged": True,
                 "iters": k + 1,
-                "r_hist": r_hist,
-                "s_hist": s_hist,
-                "rho_hist": rho_hist,
+                "r_hist": r_hist[:k + 1],
+                "s_hist": s_hist[:k + 1],
+                "rho_hist": rho_hist[:k + 1],
             }
 
+        if observe is not None:
+            observe(k, x, z, y, s)
         rho, _, _ = update_rho_fn(
             rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2
         )
+        if fast is not None:
+            fast.step(z, y, (norm64(tmp) ** 2 + s_norm ** 2) / rho_hist[k], rho != rho_hist[k])
 
     return {
         "converged": False,
@@ -115,95 +219,555 @@ def run_admm(update_rho_fn, seed=0, max_iters=2000):
     }
 
 
+def vectorize_update_rho(update_rho_fn):
+    """Wrap a scalar update_rho into the array-in/array-out contract."""
+
+    def update_rho_vec(rho, k, r_norm, s_norm, **kwargs):
+        out = [
+            update_rho_fn(float(rho_i), k, float(r_i), float(s_i), **kwargs)
+            for rho_i, r_i, s_i in zip(rho, r_norm, s_norm)
+        ]
+        new_rho, aux, mode = zip(*out)
+        return np.array(new_rho, dtype=float), np.array(aux), np.array(mode)
+
+    return update_rho_vec
+
+
+def get_update_rho_vec(module):
+    """
+    Vectorized update rule of a candidate program.
+
+    Programs may define update_rho_vec(rho, k, r_norm, s_norm, ...) taking
+    float arrays for rho / r_norm / s_norm (one entry per run) and the scalar
+    iteration k, and returning (new_rho, aux, mode) arrays of the same
+    length. Programs that only define the scalar update_rho are wrapped.
+    """
+    if hasattr(module, "update_rho_vec"):
+        return module.update_rho_vec
+    return vectorize_update_rho(module.update_rho)
+
+
+def _run_lockstep(w, V, Atb, update_rho_vecs, max_iters=2000, relax=1.0, isolate=False):
+    """
+    Advance K LASSO ADMM runs in lockstep.
+
+    Row i uses Gram eigenpairs (w[i], V[i]), or the shared (w, V) when they
+    are 1-D / 2-D, right-hand side Atb[i] and the vectorized update rule
+    update_rho_vecs[i]. Rows sharing the same rule are updated with a
+    single call per iteration. Each row retires from the active set once it
+    meets the stopping rule; one run_admm-style result dict per row is
+    returned. The iteration runs in Atb's dtype and over-relaxes with relax
+    as in run_admm.
+
+    A rule that raises or returns new_rho of the wrong shape fails the call,
+    or with isolate=True only its own rows, whose results are None.
+    """
+    K, d = Atb.shape
+    shared = V.ndim == 2
+    dtype = Atb.dtype
+
+    lam = 0.15
+    rho = np.full(K, 0.5)
+
+    x = np.zeros((K, d), dtype)
+    z = np.zeros((K, d), dtype)
+    y = np.zeros((K, d), dtype)
+
+    fns = []
+    group = np.empty(K, dtype=int)
+    for i, fn in enumerate(update_rho_vecs):
+        if fn not in fns:
+            fns.append(fn)
+        group[i] = fns.index(fn)
+
+    r_hist = [[] for _ in range(K)]
+    s_hist = [[] for _ in range(K)]
+    rho_hist = [[] for _ in range(K)]
+    converged = np.zeros(K, dtype=bool)
+    failed = np.zeros(K, dtype=bool)
+    iters = np.full(K, max_iters)
+    active = np.arange(K)
+
+    for k in range(max_iters):
+        rho_a = rho[active]
+        rho_c = rho_a.astype(dtype)[:, None]
+
+        rhs = Atb[active] + rho_c * z[active] - y[active]
+        if shared:
+            xa = ((rhs @ V) / (w + rho_c)) @ V.T
+        else:
+            Va = V[active]
+            xa = np.einsum("kij,kj->ki", Va, np.einsum("kji,kj->ki", Va, rhs) / (w[active] + rho_c))
+        za_old = z[active]
+        xh = xa if relax == 1.0 else relax * xa + (1.0 - relax) * za_old
+        za = soft(xh + y[active] / rho_c, lam / rho_c)
+
+        r = xa - za
+        s = rho_c * (za - za_old)
+        ya = y[active] + rho_c * (xh - za)
+
+        x[active] = xa
+        z[active] = za
+        y[active] = ya
+
+        # norms in float64, as run_admm's stopping rule
+        r_norm = np.linalg.norm(r.astype(np.float64, copy=False), axis=1)
+        s_norm = np.linalg.norm(s.astype(np.float64, copy=False), axis=1)
+
+        eps_pri = np.sqrt(d) * 1e-4 + 1e-3 * np.maximum(
+            np.linalg.norm(xa.astype(np.float64, copy=False), axis=1),
+            np.linalg.norm(za.astype(np.float64, copy=False), axis=1),
+        )
+        eps_dual = np.sqrt(d) * 1e-4 + 1e-3 * (
+            np.linalg.norm(ya.astype(np.float64, copy=False), axis=1) / np.maximum(rho_a, 1e-12)
+        )
+        done = (r_norm <= eps_pri) & (s_norm <= eps_dual)
+
+        for j, i in enumerate(active):
+            r_hist[i].append(float(r_norm[j]))
+            s_hist[i].append(float(s_norm[j]))
+            rho_hist[i].append(float(rho_a[j]))
+        converged[active[done]] = True
+        iters[active[done]] = k + 1
+
+        live = np.flatnonzero(~done)
+        active = active[live]
+        if active.size == 0:
+            break
+
+        for g in np.unique(group[active]):
+            sel = group[active] == g
+            try:
+                new_rho, _, _ = fns[g](rho_a[live[sel]], k, r_norm[live[sel]], s_norm[live[sel]], mu=3.0, c=1.0, p=1.2)
+                new_rho = np.asarray(new_rho, dtype=float)
+                if new_rho.shape != (int(sel.sum()),):
+                    raise ValueError(f"update_rho_vec returned new_rho of shape {new_rho.shape}, expected ({sel.sum()},)")
+            except Exception:
+                if not isolate:
+                    raise
+                failed[group == g] = True
+                continue
+            rho[active[sel]] = new_rho
+        active = active[~failed[active]]
+        if active.size == 0:
+            break
+
+    return [
+        None if failed[i] else {
+            "converged": bool(converged[i]),
+            "iters": int(iters[i]),
+            "r_hist": r_hist[i],
+            "s_hist": s_hist[i],
+            "rho_hist": rho_hist[i],
+        }
+        for i in range(K)
+    ]
+
+
+def lockstep_supported(accel=None, gap_tol=None):
+    # fast ADMM restarts and the duality-gap stop are per-run control flow
+    # the lockstep engine does not implement; those settings need run_admm
+    accel = ADMM_ACCEL if accel is None else accel
+    gap_tol = ADMM_GAP_TOL if gap_tol is None else gap_tol
+    return not accel and gap_tol is None
+
+
+def _check_lockstep(accel, gap_tol):
+    if not lockstep_supported(accel, gap_tol):
+        raise ValueError("the lockstep engine supports relax and dtype only; use run_admm for accel / gap_tol")
+
+
+def run_admm_batched(update_rho_vec, seeds=(0, 1, 2, 3), max_iters=2000, dtype=None, relax=None,
+                     accel=None, gap_tol=None):
+    """
+    Same iteration as run_admm, advanced in lockstep on one instance per seed.
+
+    Instances are stacked into (K, m, d) arrays; every instance keeps its own
+    rho and retires from the active set once it meets the stopping rule.
+    update_rho_vec follows the vectorized contract (see get_update_rho_vec).
+    dtype / relax default to ADMM_DTYPE / ADMM_RELAX; accel and gap_tol
+    (default ADMM_ACCEL / ADMM_GAP_TOL) are refused with ValueError.
+    Returns one run_admm-style result dict per seed.
+    """
+    _check_lockstep(accel, gap_tol)
+    dtype = np.dtype(dtype or ADMM_DTYPE)
+    As, bs = zip(*(make_lasso_instance(seed) for seed in seeds))
+    A = np.stack(As).astype(dtype, copy=False)
+    b = np.stack(bs).astype(dtype, copy=False)
+
+    Atb = np.einsum("kmd,km->kd", A, b)
+    # AtA[k] = V[k] diag(w[k]) V[k]^T, factored once for every instance
+    w, V = np.linalg.eigh(np.einsum("kmi,kmj->kij", A, A))
+
+    return _run_lockstep(w, V, Atb, [update_rho_vec] * len(seeds), max_iters=max_iters,
+                         relax=ADMM_RELAX if relax is None else relax)
+
+
+def run_admm_population(update_rho_vecs, seed=0, max_iters=2000, dtype=None, relax=None,
+                        accel=None, gap_tol=None):
+    """
+    Run a population of vectorized update rules on the same LASSO instance.
+
+    All candidates share one Gram eigendecomposition and are advanced in
+    lockstep; returns one run_admm-style result dict per candidate (None for
+    a candidate whose rule failed at run time). Settings as in
+    run_admm_batched.
+    """
+    _check_lockstep(accel, gap_tol)
+    dtype = np.dtype(dtype or ADMM_DTYPE)
+    A, b = make_lasso_instance(seed)
+    A, b = A.astype(dtype, copy=False), b.astype(dtype, copy=False)
+    w, V = np.linalg.eigh(A.T @ A)
+    Atb = np.tile(A.T @ b, (len(update_rho_vecs), 1))
+    return _run_lockstep(w, V, Atb, list(update_rho_vecs), max_iters=max_iters,
+                         relax=ADMM_RELAX if relax is None else relax, isolate=True)
+
+
+def merge_seed_results(results):
+    """Collapse per-seed results into one run_admm-style result (mean iters)."""
+    worst = max(results, key=lambda res: res["iters"])
+    return {
+        "converged": all(res["converged"] for res in results),
+        "iters": float(np.mean([res["iters"] for res in results])),
+        "iters_per_seed": [res["iters"] for res in results],
+        "r_hist": worst["r_hist"],
+        "s_hist": worst["s_hist"],
+        "rho_hist": worst["rho_hist"],
+    }
+
+
+# -----------------------------
+# Formal certification stages
+# -----------------------------
+
+LEAN_TIMEOUT = 120
+
+
+def formal_check(math_form):
+    # LLM checker on the extracted math; returns (is_valid, issues)
+    return parse_check_result(check_math_form(math_form, LLMClient()))
+
+
+def lean_certify(math_form, cancel=None):
+    """
+    Generate Lean 4 from math_form and compile it with `lake env lean`.
+
+    Returns True / False for proven / not proven, or None when `cancel`
+    was set first (the compiler process is killed).
+    """
+    lean4_code = get_lean4_results(math_form)
+    if cancel is not None and cancel.is_set():
+        return None
+    lean_path = write_unique_lean(lean4_code)
+
+    cmd = ["lake", "env", "lean", str(lean_path.relative_to(LEAN_PROJECT_ROOT))]
+    proc = subprocess.Popen(cmd, cwd=LEAN_PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.time() + LEAN_TIMEOUT
+    while True:
+        try:
+            proc.communicate(timeout=0.2)
+            return proc.returncode == 0
+        except subprocess.TimeoutExpired:
+            cancelled = cancel is not None and cancel.is_set()
+            if cancelled or time.time() > deadline:
+                proc.kill()
+                proc.communicate()
+                if cancelled:
+                    return None
+                raise subprocess.TimeoutExpired(cmd, LEAN_TIMEOUT)
+
+
+def _numeric_stage(module, result=None):
+    if result is not None:
+        return result
+    if len(EVAL_SEEDS) > 1:
+        if lockstep_supported():
+            return merge_seed_results(run_admm_batched(get_update_rho_vec(module), seeds=EVAL_SEEDS))
+        return merge_seed_results([run_admm(module.update_rho, seed=seed) for seed in EVAL_SEEDS])
+    return run_admm(module.update_rho, seed=EVAL_SEEDS[0])
+
+
+def _run_stages_concurrently(module, code, result=None):
+    """
+    Run the numerical stage alongside the formal chain
+    (code -> math -> {LLM check, Lean generation + compile}).
+
+    A stage that already fixes the score at zero (non-convergence, or a
+    failed formal check) cancels the rest: queued stages never start, the
+    Lean compiler is killed, in-flight LLM calls are abandoned.
+    Returns a dict with whichever of "result", "check", "proven" finished
+    and "stopped_by" ("numeric", "check" or None).
+    """
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=3)
+    out = {"stopped_by": None}
+    try:
+        stages = {
+            pool.submit(_numeric_stage, module, result): "result",
+            pool.submit(get_math_form_from_code, code, LLMClient()): "math_form",
+        }
+        while stages:
+            done, _ = wait(stages, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = stages.pop(future)
+                out[name] = future.result()
+                if name == "math_form":
+                    stages[pool.submit(formal_check, out["math_form"])] = "check"
+                    stages[pool.submit(lean_certify, out["math_form"], cancel)] = "proven"
+                elif name == "result" and not out["result"]["converged"]:
+                    out["stopped_by"] = "numeric"
+                elif name == "check" and not out["check"][0]:
+                    out["stopped_by"] = "check"
+            if out["stopped_by"] is not None:
+                break
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return out
+
+
+def _run_stages_cascade(module, code, result=None):
+    """
+    Cost-ordered stages: numerical run, then (only if the candidate can still
+    score and enter the top-k) code -> math -> LLM check -> Lean.
+
+    Returns the same dict as _run_stages_concurrently; stopped_by may also
+    be "pruned" (converged, but 1 / iters cannot enter the top-k).
+    """
+    out = {"result": _numeric_stage(module, result), "stopped_by": None}
+    if not out["result"]["converged"]:
+        out["stopped_by"] = "numeric"
+        return out
+    if not can_enter_topk(1.0 / out["result"]["iters"]):
+        out["stopped_by"] = "pruned"
+        return out
+
+    out["math_form"] = get_math_form_from_code(code, LLMClient())
+    out["check"] = formal_check(out["math_form"])
+    if not out["check"][0]:
+        out["stopped_by"] = "check"
+        return out
+    out["proven"] = lean_certify(out["math_form"])
+    return out
+
+
+# -----------------------------
+# Top-k scoreboard (cascade pruning)
+# -----------------------------
+
+_scoreboard = []
+
+
+def _update_scoreboard(score=None):
+    # returns the top-k scores, recording `score` first if given; with
+    # EVAL_SCOREBOARD the board lives in a JSON file guarded by a lock file
+    global _scoreboard
+    if not EVAL_SCOREBOARD:
+        if score is not None:
+            _scoreboard = sorted(_scoreboard + [score], reverse=True)[:EVAL_TOPK]
+        return _scoreboard
+
+    import fcntl
+
+    with open(EVAL_SCOREBOARD + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(EVAL_SCOREBOARD, encoding="utf-8") as f:
+                board = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            board = []
+        if score is not None:
+            board = sorted(board + [score], reverse=True)[:EVAL_TOPK]
+            with open(EVAL_SCOREBOARD, "w", encoding="utf-8") as f:
+                json.dump(board, f)
+    return board
+
+
+def record_score(score):
+    if EVAL_TOPK > 0 and score > 0:
+        _update_scoreboard(score)
+
+
+def can_enter_topk(bound):
+    if EVAL_TOPK <= 0:
+        return True
+    board = _update_scoreboard()
+    return len(board) < EVAL_TOPK or bound > board[-1]
+
+
+# -----------------------------
+# Result cache
+# -----------------------------
+
+_eval_cache = None
+
+
+def get_eval_cache():
+    global _eval_cache
+    if EVAL_CACHE == "off":
+        return None
+    if _eval_cache is None:
+        Path(EVAL_CACHE).parent.mkdir(parents=True, exist_ok=True)
+        _eval_cache = EvalCache(EVAL_CACHE, max_entries=EVAL_CACHE_MAX_ENTRIES)
+    return _eval_cache
+
+
+def _eval_context():
+    # evaluator settings that change a candidate's result are part of its key
+    return json.dumps({
+        "seeds": EVAL_SEEDS,
+        "solver": ADMM_SOLVER,
+        "dtype": ADMM_DTYPE,
+        "gap_tol": ADMM_GAP_TOL,
+        "gap_every": ADMM_GAP_EVERY,
+        "relax": ADMM_RELAX,
+        "accel": ADMM_ACCEL,
+    }, sort_keys=True)
+
+
 # -----------------------------
 # OpenEvolve evaluator API
 # -----------------------------
 
-def evaluate(program_path: str) -> dict:
+def load_program(program_path: str):
+    spec = importlib.util.spec_from_file_location("program", program_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["program"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def evaluate(program_path: str, result=None) -> dict:
+    """
+    Score one candidate program.
+
+    result may carry a precomputed numerical run (see evaluate_population);
+    otherwise the ADMM run happens here (results built on a precomputed run
+    are not cached). EVAL_PIPELINE selects the stage order
+    (_run_stages_cascade or _run_stages_concurrently). Programs whose
+    normalized update_rho logic matches one scored before return the cached
+    result. artifacts["behavior_fingerprint"] tags programs that act alike
+    on the probe grid (see eval_cache.behavior_fingerprint).
+    """
     start_time = time.time()
 
     try:
         # Load candidate program
-        spec = importlib.util.spec_from_file_location("program", program_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules["program"] = module
-        spec.loader.exec_module(module)
+        module = load_program(program_path)
 
         if not hasattr(module, "update_rho"):
             return _error_result("Program must define update_rho()")
 
         code = read_source_code(program_path)
-        issues, is_valid, math_form = check_results_formulation(code)
-        if not is_valid:
-            eval_time = time.time() - start_time
-
-            return {
-                "combined_score": 0.0,  # ← 关键：直接淘汰
-                "metrics": {
-                    "converged": False,
-                    "iters": float("inf"),
-                    "combined_score": 0.0,
-                    "formal_valid": False,
-                },
-                "artifacts": {
-                    "formal_check": is_valid,
-                    "issues": issues,
-                    "eval_time": eval_time,
-                },
-            }
-
-        result = run_admm(module.update_rho)
-        eval_time = time.time() - start_time
-
-        lean4_code = get_lean4_results(math_form)
+        if C1_STATIC_CHECK:
+            # milliseconds and code-specific: before any cache lookup, never cached
+            is_valid, issues = check_c1(code)
+            if not is_valid:
+                return _formal_invalid_result(is_valid, issues, time.time() - start_time, checker="static")
+
+        cache = get_eval_cache()
+        key = None
+        if cache is not None:
+            key = program_key(code, _eval_context())
+            cached = cache.get(key)
+            if cached is not None:
+                cached["artifacts"]["cache"] = "hit"
+                return cached
+
+        out = _score_candidate(module, code, result, start_time)
+        # a finite probe grid cannot prove two rules equal, so the behavior
+        # fingerprint only labels near-duplicates; nothing is reused by it
+        fingerprint = behavior_fingerprint(get_update_rho_vec(module))
+        if fingerprint is not None:
+            out["artifacts"]["behavior_fingerprint"] = fingerprint
+        # only runs made here are known to match the settings in the key
+        if cache is not None and result is None and out["artifacts"].get("status") != "PRUNED":
+            cache.put(key, out)
+        return out
 
-        lean_path = write_unique_lean(lean4_code)
-
-        proc = subprocess.run(
-            [
-                "lake", "env", "lean",
-                str(lean_path.relative_to(LEAN_PROJECT_ROOT)),
-            ],
-            cwd=LEAN_PROJECT_ROOT,
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
+    except Exception as e:
+        return _exception_result(e)
 
-        if proc.returncode != 0:
-            formal_valid = "Lean4_Not_Auto_Proven"
-            score = 0.5
-        else:
-            formal_valid = "Lean4_Auto_Proven"
-            score = 1
-
-        # -----------------------------
-        # Metrics (what evolution sees)
-        # -----------------------------
-        if not result["converged"]:
-            combined_score = 0.0
-        else:
-            combined_score = score * (
-                    1.0 / result["iters"])
 
-        metrics = {
-            "converged": result["converged"],
-            "iters": result["iters"],
-            "combined_score": combined_score,
-        }
+def _score_candidate(module, code, result, start_time):
+    if EVAL_PIPELINE == "concurrent":
+        stages = _run_stages_concurrently(module, code, result)
+    else:
+        stages = _run_stages_cascade(module, code, result)
+    eval_time = time.time() - start_time
+
+    if stages["stopped_by"] == "check":
+        is_valid, issues = stages["check"]
+        return _formal_invalid_result(is_valid, issues, eval_time)
+
+    result = stages["result"]
+    if stages["stopped_by"] in ("numeric", "pruned"):
+        formal_valid = "Skipped"
+        combined_score = 0.0
+    else:
+        proven = stages["proven"]
+        formal_valid = "Lean4_Auto_Proven" if proven else "Lean4_Not_Auto_Proven"
+        score = 1 if proven else 0.5
+        combined_score = score * (1.0 / result["iters"])
+        record_score(combined_score)
+
+    # -----------------------------
+    # Metrics (what evolution sees)
+    # -----------------------------
+    metrics = {
+        "converged": result["converged"],
+        "iters": result["iters"],
+        "combined_score": combined_score,
+    }
 
-        artifacts = build_artifacts(result, eval_time)
+    artifacts = build_artifacts(result, eval_time)
+    if stages["stopped_by"] == "pruned":
+        artifacts["status"] = "PRUNED"
+        artifacts["score_upper_bound"] = 1.0 / result["iters"]
 
-        return {
-            "combined_score": combined_score,  # ← 关键
-            "metrics": metrics,
-            "artifacts": artifacts,
-            "formal_certification": formal_valid
-        }
+    return {
+        "combined_score": combined_score,  # ← 关键
+        "metrics": metrics,
+        "artifacts": artifacts,
+        "formal_certification": formal_valid
+    }
 
 
-    except Exception as e:
-        return _exception_result(e)
+def evaluate_population(program_paths) -> list:
+    """
+    Score a whole generation of candidates.
+
+    The numerical runs of all loadable candidates advance together on each
+    EVAL_SEEDS instance (run_admm_population); formal checks and scoring
+    then run per candidate exactly as in evaluate(). Candidates the static
+    C1 check rejects are left out of the batch; one whose rule fails at run
+    time drops out of it and is scored on its own. Settings the lockstep engine
+    does not support (ADMM_ACCEL, ADMM_GAP_TOL) score every candidate on its
+    own.
+    """
+    if not lockstep_supported():
+        return [evaluate(path) for path in program_paths]
+
+    update_rho_vecs, runnable = [], []
+    for path in program_paths:
+        try:
+            if C1_STATIC_CHECK and not check_c1(read_source_code(path))[0]:
+                continue
+            module = load_program(path)
+            update_rho_vecs.append(get_update_rho_vec(module))
+            runnable.append(path)
+        except Exception:
+            continue
+
+    per_seed = [run_admm_population(update_rho_vecs, seed=seed) for seed in EVAL_SEEDS]
+    runs = []
+    for seed_runs in zip(*per_seed):
+        if any(run is None for run in seed_runs):
+            runs.append(None)  # failed in the batch: evaluate() runs and reports it on its own
+        else:
+            runs.append(merge_seed_results(list(seed_runs)) if len(seed_runs) > 1 else seed_runs[0])
+    results = dict(zip(runnable, runs))
+    return [evaluate(path, result=results.get(path)) for path in program_paths]
 
 
 # -----------------------------
@@ -217,6 +781,8 @@ def build_artifacts(result, eval_time):
         "CONVERGED" if result["converged"] else "DID NOT CONVERGE"
     )
     artifacts["iterations"] = result["iters"]
+    if "iters_per_seed" in result:
+        artifacts["iterations_per_seed"] = result["iters_per_seed"]
     artifacts["eval_time"] = f"{eval_time:.3f}s"
 
     if RICH_FEEDBACK and result["converged"]:
@@ -245,6 +811,24 @@ def build_artifacts(result, eval_time):
 # Error handling (same pattern)
 # -----------------------------
 
+def _formal_invalid_result(is_valid, issues, eval_time, checker="llm") -> dict:
+    return {
+        "combined_score": 0.0,  # ← 关键：直接淘汰
+        "metrics": {
+            "converged": False,
+            "iters": float("inf"),
+            "combined_score": 0.0,
+            "formal_valid": False,
+        },
+        "artifacts": {
+            "formal_check": is_valid,
+            "checker": checker,
+            "issues": issues,
+            "eval_time": eval_time,
+        },
+    }
+
+
 def _error_result(message: str) -> dict:
     return {
         "metrics": {
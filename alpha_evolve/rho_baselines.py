@@ -0,0 +1,231 @@
+"""
+Reference penalty (rho) strategies for adaptive ADMM
+
+Drop-in update_rho implementations with the signature the solvers and
+evaluators use,
+
+    update_rho(rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12)
+        -> (new_rho, aux, mode)     mode in {"mul", "div", "keep"}
+
+so evolved rules can be benchmarked against the literature:
+- residual_balancing:        Boyd et al. (2011) / He, Yang & Wang (2000),
+                             fixed factor when one residual dominates
+- RelativeResidualBalancing: Wohlberg (2017), balances relative residuals
+                             with an adaptive factor
+- SpectralAADMM:             Xu, Figueiredo & Goldstein (2017), spectral
+                             (Barzilai-Borwein) curvature estimates
+- Safeguarded(rule):         clamps any rule's factor into
+                             [1 / (1 + tau_k), 1 + tau_k] with summable tau_k,
+                             the C1 condition the Lean proofs rely on
+
+Stateful rules (classes) expose two optional hooks the solvers call:
+reset() at the start of a run and observe(k, x, z, y, s) with the current
+iterates right before every update. BASELINES maps names to factories, so
+each run gets a fresh instance.
+"""
+
+import numpy as np
+
+
+def tau(k, c=1.0, p=1.2):  # p>1 ensures summable
+    return c / ((k + 1.0) ** p)
+
+
+# -----------------------------
+# Residual balancing (Boyd)
+# -----------------------------
+
+def residual_balancing(rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12, incr=2.0, decr=2.0):
+    if r_norm > mu * max(s_norm, eps):
+        return rho * incr, incr, "mul"
+    if s_norm > mu * max(r_norm, eps):
+        return rho / decr, decr, "div"
+    return rho, 1.0, "keep"
+
+
+# -----------------------------
+# Relative residual balancing (Wohlberg)
+# -----------------------------
+
+class RelativeResidualBalancing:
+    """
+    Residuals are normalized by the iterates they are measured against,
+    r / max(||x||, ||z||) and s / ||y||, and rho moves by the adaptive
+    factor sqrt(r_rel / s_rel) clamped to [1, tau_max]. Without observe()
+    calls it falls back to the raw residuals.
+    """
+
+    def __init__(self, tau_max=10.0):
+        self.tau_max = tau_max
+        self.reset()
+
+    def reset(self):
+        self.primal_scale = 1.0
+        self.dual_scale = 1.0
+
+    def observe(self, k, x, z, y, s):
+        self.primal_scale = max(float(np.linalg.norm(x)), float(np.linalg.norm(z)))
+        self.dual_scale = float(np.linalg.norm(y))
+
+    def __call__(self, rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12):
+        r_rel = r_norm / max(self.primal_scale, eps)
+        s_rel = s_norm / max(self.dual_scale, eps)
+        f = np.sqrt(r_rel / max(s_rel, eps))
+        fac = min(max(f, 1.0 / f), self.tau_max)
+        if r_rel > mu * max(s_rel, eps):
+            return rho * fac, fac, "mul"
+        if s_rel > mu * max(r_rel, eps):
+            return rho / fac, fac, "div"
+        return rho, 1.0, "keep"
+
+
+# -----------------------------
+# Spectral adaptive ADMM (Xu, Figueiredo & Goldstein)
+# -----------------------------
+
+def _spectral_curvature(du, dg):
+    # hybrid steepest-descent / minimum-gradient BB estimate of the
+    # curvature dg ~ alpha du, and the correlation that validates it
+    ug = float(du @ dg)
+    uu = float(du @ du)
+    gg = float(dg @ dg)
+    if ug <= 0.0 or uu == 0.0 or gg == 0.0:
+        return None, 0.0
+    sd = gg / ug
+    mg = ug / uu
+    est = mg if 2.0 * mg > sd else sd - mg / 2.0
+    return est, ug / np.sqrt(uu * gg)
+
+
+class SpectralAADMM:
+    """
+    For the split x - z = 0 the x-step gives grad f(x_k) = -(y_{k-1} +
+    rho (x_k - z_{k-1})) = -(y_k + s_k) and the z-step y_k in dg(z_k).
+    Every `every` iterations BB estimates alpha (of f) and beta (of g) are
+    taken over the differences since the last estimate, and
+    rho = sqrt(alpha beta) (or the one estimate whose correlation exceeds
+    eps_cor; otherwise rho is kept). Needs observe() to see the iterates.
+    """
+
+    def __init__(self, every=2, eps_cor=0.2):
+        self.every = every
+        self.eps_cor = eps_cor
+        self.reset()
+
+    def reset(self):
+        self.current = None
+        self.anchor = None
+        self.k_anchor = 0
+
+    def observe(self, k, x, z, y, s):
+        x, z, y = (np.array(v, dtype=np.float64) for v in (x, z, y))
+        self.current = (x, z, y, -(y + s))
+
+    def __call__(self, rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12):
+        if self.current is None:
+            return rho, 0.0, "keep"
+        if self.anchor is None or k - self.k_anchor < self.every:
+            if self.anchor is None:
+                self.anchor, self.k_anchor = self.current, k
+            return rho, 0.0, "keep"
+
+        x, z, y, grad_f = self.current
+        x0, z0, y0, grad_f0 = self.anchor
+        self.anchor, self.k_anchor = self.current, k
+
+        alpha, alpha_cor = _spectral_curvature(x - x0, grad_f - grad_f0)
+        beta, beta_cor = _spectral_curvature(z - z0, y - y0)
+        alpha_ok = alpha is not None and alpha_cor > self.eps_cor
+        beta_ok = beta is not None and beta_cor > self.eps_cor
+        if alpha_ok and beta_ok:
+            new_rho = np.sqrt(alpha * beta)
+        elif alpha_ok:
+            new_rho = alpha
+        elif beta_ok:
+            new_rho = beta
+        else:
+            return rho, 1.0, "keep"
+
+        new_rho = float(new_rho)
+        if new_rho > rho:
+            return new_rho, new_rho / rho, "mul"
+        if new_rho < rho:
+            return new_rho, rho / new_rho, "div"
+        return rho, 1.0, "keep"
+
+
+# -----------------------------
+# Summable-tau safeguard
+# -----------------------------
+
+class Safeguarded:
+    """
+    Wrap any rule so that new_rho / rho stays in [1 / (1 + tau_k), 1 + tau_k]
+    with tau_k = c / (k + 1)^p (c, p from the call unless fixed here), the
+    bounded-variation condition of the convergence proofs.
+    """
+
+    def __init__(self, rule, c=None, p=None):
+        self.rule = rule
+        self.c = c
+        self.p = p
+
+    def reset(self):
+        if hasattr(self.rule, "reset"):
+            self.rule.reset()
+
+    def observe(self, k, x, z, y, s):
+        if hasattr(self.rule, "observe"):
+            self.rule.observe(k, x, z, y, s)
+
+    def __call__(self, rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12):
+        target, _, _ = self.rule(rho, k, r_norm, s_norm, mu=mu, c=c, p=p, eps=eps)
+        t = tau(k, c if self.c is None else self.c, p if self.p is None else self.p)
+        if target > rho:
+            return rho * min(target / rho, 1.0 + t), t, "mul"
+        if target < rho:
+            return rho / min(rho / target, 1.0 + t), t, "div"
+        return rho, t, "keep"
+
+
+BASELINES = {
+    "residual_balancing": lambda: residual_balancing,
+    "residual_balancing_safe": lambda: Safeguarded(residual_balancing),
+    "relative_residual": RelativeResidualBalancing,
+    "relative_residual_safe": lambda: Safeguarded(RelativeResidualBalancing()),
+    "spectral": SpectralAADMM,
+    "spectral_safe": lambda: Safeguarded(SpectralAADMM(), c=1e10, p=2.0),
+}
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def benchmark(rules=None, seeds=(0, 1, 2, 3), max_iters=2000):
+    """
+    Iterations to convergence of each rule on the evaluator's LASSO suite.
+
+    rules maps names to zero-argument factories (default: BASELINES);
+    wrap a plain update_rho as lambda: update_rho.
+    Returns {name: {"iters": [...], "mean_iters": ..., "converged": bool}}.
+    """
+    from alpha_evolve.evaluator import run_admm
+
+    results = {}
+    for name, factory in (rules or BASELINES).items():
+        iters, converged = [], True
+        for seed in seeds:
+            run = run_admm(factory(), seed=seed, max_iters=max_iters)
+            iters.append(run["iters"])
+            converged = converged and run["converged"]
+        results[name] = {"iters": iters, "mean_iters": float(np.mean(iters)), "converged": converged}
+    return results
+
+
+if __name__ == "__main__":
+    from alpha_evolve.initial_program import update_rho
+
+    rules = dict(BASELINES, initial_program=lambda: update_rho)
+    for name, res in benchmark(rules).items():
+        print(f"{name:26s} mean_iters={res['mean_iters']:8.1f} converged={res['converged']} iters={res['iters']}")
@@ -1,98 +1,149 @@
+"""
+Evaluator for the multi-RHS L1 model (min ||X||_1 s.t. A X = B)
+
+Candidate programs provide update_rho(rho, k, r_norm, s_norm, ...), the
+same residual-driven penalty hook the LASSO evaluator uses. The solver is
+the fixed l1() of the seed program; only the candidate's update_rho is
+plugged into it (opts['update_rho']).
+
+Each candidate is run on a fixed, seeded suite of sparse-recovery
+instances and scored by:
+- iterations to convergence (mean over the suite)
+- wall time of the whole suite
+
+combined_score = 1 / mean iterations when every instance converges, else 0.
+"""
+
+import sys
+import time
+import traceback
+import importlib.util
 import numpy as np
-import matplotlib.pyplot as plt
 
+from alpha_evolve.sparse_model.L1.initial_program import l1
 
-def prox_l1(b, lambd):
-    # The proximal operator of the l1 norm
-    return np.maximum(0, b - lambd) + np.minimum(0, b + lambd)
 
+# -----------------------------
+# Fixed benchmark suite
+# -----------------------------
 
-def l1(A, B, opts):
-    # Set default options
-    tol = opts.get('tol', 1e-8)
-    max_iter = opts.get('max_iter', 500)
-    rho = opts.get('rho', 1.1)
-    mu = opts.get('mu', 1e-4)
-    max_mu = opts.get('max_mu', 1e10)
-    DEBUG = opts.get('DEBUG', 0)
+SUITE = [
+    # (seed, d, na, nb, nnz per column)
+    (0, 100, 200, 20, 10),
+    (1, 100, 200, 20, 10),
+    (2, 60, 150, 20, 6),
+    (3, 150, 300, 20, 15),
+]
 
-    d, na = A.shape
-    _, nb = B.shape
-
-    X = np.zeros((na, nb))
-    Z = np.zeros_like(X)
-    Y1 = np.zeros((d, nb))
-    Y2 = np.zeros_like(X)
-
-    AtB = A.T @ B
-    I = np.eye(na)
-    invAtAI = np.linalg.inv(A.T @ A + I) @ I
-
-    for iter in range(1, max_iter + 1):
-        Xk = X.copy()
-        Zk = Z.copy()
-        # update X
-        X = prox_l1(Z - Y2 / mu, 1 / mu)
-        # update Z
-        Z = invAtAI @ (-A.T @ Y1 / mu + AtB + Y2 / mu + X)
-        dY1 = A @ Z - B
-        dY2 = X - Z
-        chgX = np.max(np.abs(Xk - X))
-        chgZ = np.max(np.abs(Zk - Z))
-        chg = max([chgX, chgZ, np.max(np.abs(dY1)), np.max(np.abs(dY2))])
-
-        if DEBUG and (iter == 1 or iter % 10 == 0):
-            obj = np.linalg.norm(X.ravel(), 1)
-            err = np.sqrt(np.linalg.norm(dY1, 'fro') ** 2 + np.linalg.norm(dY2, 'fro') ** 2)
-            print(f'iter {iter}, mu={mu}, obj={obj}, err={err}')
-
-        if chg < tol:
-            break
-
-        Y1 = Y1 + mu * dY1
-        Y2 = Y2 + mu * dY2
-        mu = min(rho * mu, max_mu)
-
-    obj = np.linalg.norm(X.ravel(), 1)
-    err = np.sqrt(np.linalg.norm(dY1, 'fro') ** 2 + np.linalg.norm(dY2, 'fro') ** 2)
-
-    return X, obj, err, iter
-
-
-def evaluate(instances: dict) -> float:
-    # Generate toy data
-    d = instances['d']
-    na = instances['na']
-    nb = instances['nb']
-
-    A = np.random.randn(d, na)
-    X = np.random.randn(na, nb)
-    B = A @ X
-    b = B[:, 0]
-
-    # Options for the l1 minimization
-    opts = instances['opts']
-
-    # Perform l1 minimization
-    X2, obj, err, iter = l1(A, B, opts)
-    print(f'Iterations: {iter}, Objective: {obj}, Error: {err}')
-    return -iter
-
-
-datasets = {}
+OPTS = {
+    'tol': 1e-6,
+    'max_iter': 2000,
+    'mu': 1.0,
+}
 
 
-datasets['l1'] = {'opts': {
-    'tol': 1e-6,
-    'max_iter': 1000,
-    'rho': 1.1,
-    'mu': 1e-4,
-    'max_mu': 1e10,
-    'DEBUG': 1
-},
-'d': 100,
-'na': 200,
-'nb': 100}
-
-
-evaluate(datasets['l1'])
\ No newline at end of file
+def make_l1_instance(seed, d, na, nb, nnz):
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal((d, na))
+    X = np.zeros((na, nb))
+    for j in range(nb):
+        X[rng.choice(na, nnz, replace=False), j] = rng.standard_normal(nnz)
+    return A, A @ X, X
+
+
+def run_suite(update_rho_fn, suite=SUITE, opts=OPTS):
+    runs = []
+    for instance in suite:
+        A, B, X_true = make_l1_instance(*instance)
+        start = time.time()
+        X, obj, err, iters, converged = l1(A, B, dict(opts, update_rho=update_rho_fn))
+        runs.append({
+            "iters": iters,
+            "converged": converged,
+            "err": float(err),
+            "recovery_err": float(np.max(np.abs(X - X_true))),
+            "time": time.time() - start,
+        })
+    return runs
+
+
+# -----------------------------
+# OpenEvolve evaluator API
+# -----------------------------
+
+def evaluate(program_path: str) -> dict:
+    start_time = time.time()
+
+    try:
+        spec = importlib.util.spec_from_file_location("program", program_path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["program"] = module
+        spec.loader.exec_module(module)
+
+        if not hasattr(module, "update_rho"):
+            return _error_result("Program must define update_rho()")
+
+        runs = run_suite(module.update_rho)
+        eval_time = time.time() - start_time
+
+        converged = all(run["converged"] for run in runs)
+        mean_iters = float(np.mean([run["iters"] for run in runs]))
+        wall_time = float(sum(run["time"] for run in runs))
+        combined_score = 1.0 / mean_iters if converged else 0.0
+
+        metrics = {
+            "converged": converged,
+            "iters": mean_iters,
+            "wall_time": wall_time,
+            "time_score": 1.0 / (1.0 + wall_time),
+            "combined_score": combined_score,
+        }
+
+        artifacts = {
+            "status": "CONVERGED" if converged else "DID NOT CONVERGE",
+            "iterations_per_instance": [run["iters"] for run in runs],
+            "max_recovery_err": max(run["recovery_err"] for run in runs),
+            "eval_time": f"{eval_time:.3f}s",
+        }
+
+        return {
+            "combined_score": combined_score,
+            "metrics": metrics,
+            "artifacts": artifacts,
+        }
+
+    except Exception as e:
+        return _exception_result(e)
+
+
+# -----------------------------
+# Error handling (same pattern)
+# -----------------------------
+
+def _error_result(message: str) -> dict:
+    return {
+        "metrics": {
+            "converged": False,
+            "iters": 0,
+            "combined_score": 0.0,
+        },
+        "artifacts": {
+            "error": message,
+            "status": "ERROR",
+        },
+    }
+
+
+def _exception_result(e: Exception) -> dict:
+    return {
+        "metrics": {
+            "converged": False,
+            "iters": 0,
+            "combined_score": 0.0,
+        },
+        "artifacts": {
+            "exception": str(e),
+            "traceback": traceback.format_exc(),
+            "status": "EXCEPTION",
+        },
+    }
@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.linalg import cho_factor, cho_solve
 
 
 def prox_l1(b, lambd):
@@ -7,7 +8,97 @@ def prox_l1(b, lambd):
     return np.maximum(0, b - lambd) + np.minimum(0, b + lambd)
 
 
+def tau(k, c=1.0, p=1.2):
+    """
+    Diminishing step size sequence.
+
+    Requirements:
+    - tau_k >= 0
+    - summable for p > 1
+    - depends only on k and fixed constants
+    """
+    return c / ((k + 1.0) ** p)
+
+
+def update_rho(
+    rho,
+    k,
+    r_norm,
+    s_norm,
+    mu=3.0,
+    c=1.0,
+    p=1.2,
+    eps=1e-12,
+):
+    """
+    Residual-driven penalty update, same contract as the LASSO update_rho.
+
+    Here rho is the ADMM penalty of l1() (called mu inside the solver),
+    r_norm the primal residual ||[A Z - B; X - Z]||_F and s_norm the dual
+    residual mu * ||Z - Z_prev||_F.
+    """
+
+    # Summable step size (independent of residuals)
+    t = tau(k, c, p)
+
+    # Direction logic ONLY (may depend on residuals)
+    if r_norm > mu * max(s_norm, eps):
+        new_rho = rho * (1.0 + t)
+        mode = "mul"
+
+    elif s_norm > mu * max(r_norm, eps):
+        new_rho = rho / (1.0 + t)
+        mode = "div"
+
+    else:
+        new_rho = rho
+        mode = "keep"
+
+    # Auxiliary scalar: purely tau_k (no residual dependence)
+    aux = t
+
+    return new_rho, aux, mode
+
+
+def gram_factor(A, At):
+    # One-time Cholesky factor for solves with I + A^T A. When A has fewer
+    # rows than columns, factor the small I + A A^T instead (Woodbury).
+    d, na = A.shape
+    if d < na:
+        return 'woodbury', cho_factor(np.eye(d, dtype=A.dtype) + A @ At)
+    return 'gram', cho_factor(At @ A + np.eye(na, dtype=A.dtype))
+
+
+def gram_solve(A, At, factor, V):
+    # (I + A^T A)^{-1} V for a block of right-hand sides V
+    kind, F = factor
+    if kind == 'woodbury':
+        # (I + A^T A)^{-1} = I - A^T (I + A A^T)^{-1} A
+        return V - At @ cho_solve(F, A @ V)
+    return cho_solve(F, V)
+
+
 def l1(A, B, opts):
+    # working precision, e.g. np.float32 for cheap screening runs
+    dtype = opts.get('dtype', np.float64)
+
+    A = A.astype(dtype, copy=False)
+    B = B.astype(dtype, copy=False)
+
+    At = np.ascontiguousarray(A.T)
+    factor = gram_factor(A, At)
+
+    X, dY1, dY2, iter, converged = l1_block(A, At, factor, B, opts, retire=opts.get('retire', False))
+    obj, err = l1_report(X, dY1, dY2)
+
+    return X, obj, err, iter, converged
+
+
+def l1_block(A, At, factor, B, opts, retire=False):
+    # ADMM iterations for the columns of B. Every column is an independent
+    # problem; with retire, a column leaves the working set as soon as its
+    # own change drops below tol instead of waiting for the slowest one.
+    # converged reports whether every column met tol within max_iter.
     # Set default options
     tol = opts.get('tol', 1e-8)
     max_iter = opts.get('max_iter', 500)
@@ -15,18 +106,21 @@ def l1(A, B, opts):
     mu = opts.get('mu', 1e-4)
     max_mu = opts.get('max_mu', 1e10)
     DEBUG = opts.get('DEBUG', 0)
+    # residual-driven penalty rule with the update_rho signature; without
+    # one, mu grows geometrically by rho up to max_mu
+    update_rule = opts.get('update_rho')
 
     d, na = A.shape
     _, nb = B.shape
 
-    X = np.zeros((na, nb))
+    X = np.zeros((na, nb), A.dtype)
     Z = np.zeros_like(X)
-    Y1 = np.zeros((d, nb))
+    Y1 = np.zeros((d, nb), A.dtype)
     Y2 = np.zeros_like(X)
 
-    AtB = A.T @ B
-    I = np.eye(na)
-    invAtAI = np.linalg.inv(A.T @ A + I) @ I
+    X_out, dY1_out, dY2_out = np.zeros_like(X), np.zeros_like(Y1), np.zeros_like(X)
+    cols = np.arange(nb)
+    converged = False
 
     for iter in range(1, max_iter + 1):
         Xk = X.copy()
@@ -34,29 +128,58 @@ def l1(A, B, opts):
         # update X
         X = prox_l1(Z - Y2 / mu, 1 / mu)
         # update Z
-        Z = invAtAI @ (-A.T @ Y1 / mu + AtB + Y2 / mu + X)
+        Z = gram_solve(A, At, factor, At @ (B - Y1 / mu) + Y2 / mu + X)
         dY1 = A @ Z - B
         dY2 = X - Z
-        chgX = np.max(np.abs(Xk - X))
-        chgZ = np.max(np.abs(Zk - Z))
-        chg = max([chgX, chgZ, np.max(np.abs(dY1)), np.max(np.abs(dY2))])
+        # per-column max change of X, Z and both constraint residuals
+        chg = np.max([np.max(np.abs(Xk - X), axis=0), np.max(np.abs(Zk - Z), axis=0),
+                      np.max(np.abs(dY1), axis=0), np.max(np.abs(dY2), axis=0)], axis=0)
 
         if DEBUG and (iter == 1 or iter % 10 == 0):
-            obj = np.linalg.norm(X.ravel(), 1)
-            err = np.sqrt(np.linalg.norm(dY1, 'fro') ** 2 + np.linalg.norm(dY2, 'fro') ** 2)
+            obj, err = l1_report(X, dY1, dY2)
             print(f'iter {iter}, mu={mu}, obj={obj}, err={err}')
 
-        if chg < tol:
+        if not retire and np.max(chg) < tol:
+            converged = True
             break
 
+        if retire:
+            done = chg < tol
+            if np.any(done):
+                X_out[:, cols[done]] = X[:, done]
+                dY1_out[:, cols[done]] = dY1[:, done]
+                dY2_out[:, cols[done]] = dY2[:, done]
+                keep = ~done
+                cols = cols[keep]
+                X, Z, Y1, Y2, B = X[:, keep], Z[:, keep], Y1[:, keep], Y2[:, keep], B[:, keep]
+                dY1, dY2, Zk = dY1[:, keep], dY2[:, keep], Zk[:, keep]
+                if cols.size == 0:
+                    converged = True
+                    break
+
         Y1 = Y1 + mu * dY1
         Y2 = Y2 + mu * dY2
-        mu = min(rho * mu, max_mu)
+        if update_rule is None:
+            mu = min(rho * mu, max_mu)
+        else:
+            r_norm = np.sqrt(np.einsum('ij,ij->', dY1, dY1, dtype=np.float64)
+                             + np.einsum('ij,ij->', dY2, dY2, dtype=np.float64))
+            dZ = Z - Zk
+            s_norm = mu * np.sqrt(np.einsum('ij,ij->', dZ, dZ, dtype=np.float64))
+            mu, _, _ = update_rule(mu, iter - 1, float(r_norm), float(s_norm))
+
+    X_out[:, cols] = X
+    dY1_out[:, cols] = dY1
+    dY2_out[:, cols] = dY2
+
+    return X_out, dY1_out, dY2_out, iter, converged
 
-    obj = np.linalg.norm(X.ravel(), 1)
-    err = np.sqrt(np.linalg.norm(dY1, 'fro') ** 2 + np.linalg.norm(dY2, 'fro') ** 2)
 
-    return X, obj, err, iter
+def l1_report(X, dY1, dY2):
+    # objective and residual norm, accumulated in float64 at any precision
+    obj = float(np.abs(X).sum(dtype=np.float64))
+    err = np.sqrt(np.einsum('ij,ij->', dY1, dY1, dtype=np.float64) + np.einsum('ij,ij->', dY2, dY2, dtype=np.float64))
+    return obj, err
 
 
 def evaluate(instances: dict) -> float:
@@ -65,8 +188,9 @@ def evaluate(instances: dict) -> float:
     na = instances['na']
     nb = instances['nb']
 
-    A = np.random.randn(d, na)
-    X = np.random.randn(na, nb)
+    rng = np.random.default_rng(instances.get('seed', 0))
+    A = rng.standard_normal((d, na))
+    X = rng.standard_normal((na, nb))
     B = A @ X
     b = B[:, 0]
 
@@ -74,7 +198,7 @@ def evaluate(instances: dict) -> float:
     opts = instances['opts']
 
     # Perform l1 minimization
-    X2, obj, err, iter = l1(A, B, opts)
+    X2, obj, err, iter, converged = l1(A, B, opts)
     print(f'Iterations: {iter}, Objective: {obj}, Error: {err}')
     return -iter
 
@@ -90,9 +214,11 @@ datasets['l1'] = {'opts': {
     'max_mu': 1e10,
     'DEBUG': 1
 },
+'seed': 0,
 'd': 100,
 'na': 200,
 'nb': 100}
 
 
-evaluate(datasets['l1'])
\ No newline at end of file
+if __name__ == "__main__":
+    evaluate(datasets['l1'])
@@ -0,0 +1,123 @@
+"""
+Column-parallel driver for the multi-RHS L1 solver
+
+Every column of B is an independent problem, so B is cut into column
+blocks that worker processes solve with l1_block(..., retire=True).
+A, A^T, the Cholesky factor and B are placed once in
+multiprocessing.shared_memory; workers map them as NumPy views and write
+their columns of X straight into a shared output, so nothing but block
+indices crosses the process boundary.
+
+Workers each run their own BLAS; limit its threads (e.g.
+OMP_NUM_THREADS=1) so that n_workers processes do not oversubscribe the
+cores.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from alpha_evolve.sparse_model.L1.initial_program import gram_factor, l1_block, l1_report
+
+
+# -----------------------------
+# Shared-memory arrays
+# -----------------------------
+
+def _share(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    # pool workers share the parent's resource tracker, and the parent
+    # unlinks every segment once the pool is done
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+
+_worker = {}
+
+
+def _init_worker(specs, kind, lower, opts):
+    for key, spec in specs.items():
+        _worker[key] = _attach(spec)
+    _worker["factor"] = (kind, (_worker["F"][1], lower))
+    _worker["opts"] = opts
+
+
+def _solve_block(start, stop):
+    A, At, B = _worker["A"][1], _worker["At"][1], _worker["B"][1]
+    X, dY1, dY2 = _worker["X"][1], _worker["dY1"][1], _worker["dY2"][1]
+
+    X_blk, dY1_blk, dY2_blk, iter, converged = l1_block(A, At, _worker["factor"], B[:, start:stop], _worker["opts"],
+                                                        retire=True)
+    X[:, start:stop] = X_blk
+    dY1[:, start:stop] = dY1_blk
+    dY2[:, start:stop] = dY2_blk
+    return iter, converged
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+
+def l1_parallel(A, B, opts, n_workers=None, block_size=None):
+    """
+    Same problem and return values as l1(A, B, opts), solved block-wise.
+
+    B is split into column blocks of block_size (default: about four blocks
+    per worker) and each block retires its converged columns early. The
+    returned iteration count is that of the slowest block, and the run has
+    converged only if every block has.
+    """
+    dtype = opts.get('dtype', np.float64)
+    A = np.ascontiguousarray(A, dtype=dtype)
+    B = np.ascontiguousarray(B, dtype=dtype)
+    d, na = A.shape
+    _, nb = B.shape
+
+    n_workers = n_workers or os.cpu_count() or 1
+    block_size = block_size or max(1, -(-nb // (4 * n_workers)))
+
+    At = np.ascontiguousarray(A.T)
+    kind, (F, lower) = gram_factor(A, At)
+
+    arrays = {
+        "A": A,
+        "At": At,
+        "F": np.ascontiguousarray(F),
+        "B": B,
+        "X": np.zeros((na, nb), dtype),
+        "dY1": np.zeros((d, nb), dtype),
+        "dY2": np.zeros((na, nb), dtype),
+    }
+    segments, specs = {}, {}
+    try:
+        for key, arr in arrays.items():
+            segments[key], specs[key] = _share(arr)
+
+        worker_opts = {k: v for k, v in opts.items() if k != 'DEBUG'}
+        blocks = [(start, min(start + block_size, nb)) for start in range(0, nb, block_size)]
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                 initargs=(specs, kind, lower, worker_opts)) as pool:
+            iters, converged = zip(*pool.map(_solve_block, *zip(*blocks)))
+
+        X, dY1, dY2 = (np.ndarray(arrays[key].shape, dtype=dtype, buffer=segments[key].buf).copy()
+                       for key in ("X", "dY1", "dY2"))
+    finally:
+        for shm in segments.values():
+            shm.close()
+            shm.unlink()
+
+    obj, err = l1_report(X, dY1, dY2)
+    return X, obj, err, max(iters), all(converged)
@@ -1,9 +1,24 @@
+import os
+import multiprocessing as mp
+
 import numpy as np
 import matplotlib.pyplot as plt
 
+from alpha_evolve.admm_linalg import (AndersonMixer, BoydStopping, FastRestart, GapStopping, accumulate_gram, as_dtype,
+                                      lasso_duality_gap, load_rows, make_x_solver, norm64, resolve_gram_solver,
+                                      rmatvec)
+
 
-def soft(u, k):
-    return np.sign(u) * np.maximum(np.abs(u) - k, 0.0)
+def soft(u, k, out=None, tmp=None):
+    if out is None:
+        return np.sign(u) * np.maximum(np.abs(u) - k, 0.0)
+    # in-place variant: out must not alias u, tmp is scratch of u's shape
+    tmp = np.abs(u, out=tmp)
+    tmp -= k
+    np.maximum(tmp, 0.0, out=tmp)
+    np.sign(u, out=out)
+    out *= tmp
+    return out
 
 
 def tau(k, c=1.0, p=1.2):  # p>1 ensures summable
@@ -19,52 +34,473 @@ def update_rho(rho, k, r_norm, s_norm, mu=3.0, c=1.0, p=1.2, eps=1e-12):
     return rho, t, "keep"
 
 
-def admm_lasso_adaptive(A, b, lam, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
-                        mu=3.0, c=1.0, p=1.2, verbose=True):
-    m, d = A.shape
-    x = np.zeros(d);
-    z = np.zeros(d);
-    y = np.zeros(d);
-    rho = float(rho0)
-    AtA = A.T @ A;
-    Atb = A.T @ b;
-    I = np.eye(d)
+def _admm_lasso_iterate(xsolver, Atb, lam, x, z, y, rho, iters=2000, abstol=1e-4, reltol=1e-3,
+                        mu=3.0, c=1.0, p=1.2, check_every=1, k0=0, btb=None, gap_tol=None,
+                        gap_every=10, relax=1.0, accel=False, anderson=0, update_rho_fn=None,
+                        n_full=None, verbose=True):
+    # update_rho_fn replaces the module-level update_rho (e.g. a rule from
+    # alpha_evolve.rho_baselines; its optional reset / observe hooks are called)
+    # k0 offsets the iteration counter seen by update_rho, so a run split
+    # into several calls keeps one tau schedule
+    # gap_tol (needs btb = ||b||^2) also stops, with a certificate, once the
+    # duality gap at z is at most gap_tol; it is evaluated every gap_every
+    # iterations, alongside the Boyd test
+    # relax in (1, 2) over-relaxes the z/y updates with relax * x + (1 - relax) z;
+    # accel=True runs restarted fast ADMM (momentum on z, y; exact stopping checks)
+    # anderson=m applies type-II Anderson acceleration with memory m to the
+    # fixed-point map (z, y/rho) -> next (z, y/rho); a step whose residual
+    # grows falls back to plain ADMM and clears the memory, as does any
+    # change of rho (exact stopping checks)
+    # n_full is the length of the full problem when x, z, y are a reduced
+    # (screened) subvector; the absolute stopping tolerance is sized by it
+    if accel and anderson:
+        raise ValueError("accel and anderson are alternative accelerations; enable at most one")
+    d = Atb.shape[0]
+    dtype = Atb.dtype  # working precision; norms are accumulated in float64
+    # state is updated in place: x, z, y, r, s are rows of one block (so the
+    # stopping norms are a single fused pass), plus scratch buffers for every
+    # intermediate so the loop itself does not allocate
+    W = np.empty((5, d), dtype)
+    W[0], W[1], W[2] = x, z, y
+    x, z, y, r, s = W
+    rhs, u, tmp, z_old = np.empty(d, dtype), np.empty(d, dtype), np.empty(d, dtype), np.empty(d, dtype)
+    xh = x if relax == 1.0 else np.empty(d, dtype)
+    fast = FastRestart(z, y) if accel else None
+    zh, yh = (fast.z_hat, fast.y_hat) if accel else (z, y)  # points the x-update reads
+    mixer = None
+    if anderson:
+        mixer = AndersonMixer(2 * d, m=anderson, dtype=dtype)
+        g, f, y_old = np.empty(2 * d, dtype), np.empty(2 * d, dtype), np.empty(d, dtype)
+        f_norm_prev = np.inf
+    exact = accel or anderson
+    stopping = BoydStopping(W, abstol, reltol, check_every=1 if exact else check_every, relax=relax, n=n_full)
+    gap_stopping = None if gap_tol is None else GapStopping(xsolver, Atb, btb, lam, gap_tol, every=gap_every)
+    gap = np.inf
 
-    r_hist, s_hist, rho_hist, mode_hist = [], [], [], []
+    r_hist, s_hist, rho_hist = np.empty(iters), np.empty(iters), np.empty(iters)
+    mode_hist = []
+    rule = update_rho if update_rho_fn is None else update_rho_fn
+    if hasattr(rule, "reset"):
+        rule.reset()
+    observe = getattr(rule, "observe", None)
     cnt = {"mul": 0, "div": 0, "keep": 0}
+    converged = False
+    n = 0
 
     for k in range(iters):
-        x = np.linalg.solve(AtA + rho * I, Atb + rho * z - y)
-        z_old = z.copy()
-        z = soft(x + y / rho, lam / rho)
-
-        r = x - z
-        s = rho * (z - z_old)
-        y = y + rho * r
+        if fast is not None:
+            fast.begin(z, y)
+        if mixer is not None:
+            np.copyto(y_old, y)
+        np.multiply(zh, rho, out=rhs)  # rhs = Atb + rho * z - y
+        rhs += Atb
+        rhs -= yh
+        xsolver.solve(rhs, rho, out=x)
+        np.copyto(z_old, zh)
+        if relax != 1.0:  # xh = relax * x + (1 - relax) * z
+            np.multiply(z_old, 1.0 - relax, out=xh)
+            np.multiply(x, relax, out=tmp)
+            xh += tmp
+        np.divide(yh, rho, out=u)  # z = soft(xh + y / rho, lam / rho)
+        u += xh
+        soft(u, lam / rho, out=z, tmp=tmp)
 
-        r_norm = float(np.linalg.norm(r))
-        s_norm = float(np.linalg.norm(s))
-        r_hist.append(r_norm);
-        s_hist.append(s_norm);
-        rho_hist.append(rho)
+        np.subtract(x, z, out=r)
+        np.subtract(z, z_old, out=s)
+        s *= rho
+        np.subtract(xh, z, out=tmp)  # y = y + rho * (xh - z)
+        tmp *= rho
+        if fast is not None:
+            np.add(yh, tmp, out=y)
+        else:
+            y += tmp
 
         # stopping (Boyd)
-        eps_pri = np.sqrt(d) * abstol + reltol * max(np.linalg.norm(x), np.linalg.norm(z))
-        eps_dual = np.sqrt(d) * abstol + reltol * (np.linalg.norm(y) / rho)
-        if r_norm <= eps_pri and s_norm <= eps_dual:
+        r_norm, s_norm, converged = stopping.check(k, rho)
+        r_hist[k] = r_norm
+        s_hist[k] = s_norm
+        rho_hist[k] = rho
+        n = k + 1
+        if gap_stopping is not None and not converged:
+            gap, converged = gap_stopping.check(k0 + k, z)
+        if converged:
             break
 
-        rho, t, mode = update_rho(rho, k, r_norm, s_norm, mu=mu, c=c, p=p)
+        if observe is not None:
+            observe(k0 + k, x, z, y, s)
+        rho, t, mode = rule(rho, k0 + k, r_norm, s_norm, mu=mu, c=c, p=p)
         cnt[mode] += 1
         mode_hist.append(mode)
+        if fast is not None:
+            fast.step(z, y, (norm64(tmp) ** 2 + s_norm ** 2) / rho_hist[k], rho != rho_hist[k])
+        if mixer is not None:
+            # g = T(w) = (z, y / rho), f = g - w, both at the rho of this step
+            rho_k = rho_hist[k]
+            g[:d] = z
+            np.divide(y, rho_k, out=g[d:])
+            np.subtract(z, z_old, out=f[:d])
+            np.subtract(y, y_old, out=f[d:])
+            f[d:] /= rho_k
+            f_norm = norm64(f)
+            if rho != rho_k or f_norm > f_norm_prev:
+                mixer.reset()
+            if rho == rho_k and mixer.mix(g, f):
+                z[...] = g[:d]
+                np.multiply(g[d:], rho_k, out=y)
+            f_norm_prev = f_norm
 
         if verbose and k % 50 == 0:
-            print(f"k={k:4d} r={r_norm:.2e} s={s_norm:.2e} rho={rho_hist[-1]:.2e} -> {rho:.2e} ({mode}, tau={t:.2e})")
+            print(f"k={k0 + k:4d} r={r_norm:.2e} s={s_norm:.2e} rho={rho_hist[k]:.2e} -> {rho:.2e} ({mode}, tau={t:.2e})")
+
+    if verbose:
+        print("rho update counts:", cnt)
+
+    state = {"x": x, "z": z, "y": y, "rho": rho, "iters": n, "converged": converged, "gap": gap}
+    return state, (rho_hist[:n], r_hist[:n], s_hist[:n], mode_hist)
+
+
+def admm_lasso_adaptive(A, b, lam, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
+                        mu=3.0, c=1.0, p=1.2, solver="auto", solver_opts=None, dtype=np.float64,
+                        check_every=1, gap_tol=None, gap_every=10, relax=1.0, accel=False, anderson=0,
+                        update_rho_fn=None, verbose=True):
+    # A may be a dense array, a scipy.sparse matrix or a matrix-free operator
+    # with matvec/rmatvec ("auto" then uses CG; see admm_linalg for the
+    # closed-form "orthogonal" / "circulant" solvers)
+    # dtype=np.float32 runs the iteration in single precision
+    # check_every=N recomputes the x/z/y stopping norms only every N
+    # iterations (the reported stopping iteration stays exact)
+    # gap_tol stops once the duality gap is certified below it (checked
+    # every gap_every iterations)
+    # relax (over-relaxation, 1 < relax < 2) and accel (restarted fast ADMM)
+    # select the accelerated variants, anderson=m adds Anderson acceleration;
+    # see _admm_lasso_iterate
+    m, d = A.shape
+    x = np.zeros(d, dtype);
+    z = np.zeros(d, dtype);
+    y = np.zeros(d, dtype);
+    # AtA is formed inside the solver only when it works in d dimensions
+    A = as_dtype(A, dtype)
+    Atb = rmatvec(A, b).astype(dtype, copy=False);
+    xsolver = make_x_solver(A, solver, **(solver_opts or {}))
+
+    _, hist = _admm_lasso_iterate(xsolver, Atb, lam, x, z, y, float(rho0), iters=iters,
+                                  abstol=abstol, reltol=reltol, mu=mu, c=c, p=p,
+                                  check_every=check_every, btb=float(b @ b), gap_tol=gap_tol,
+                                  gap_every=gap_every, relax=relax, accel=accel, anderson=anderson,
+                                  update_rho_fn=update_rho_fn, verbose=verbose)
+    return hist
+
+
+def admm_lasso_path(A, b, lams, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
+                    mu=3.0, c=1.0, p=1.2, solver="auto", solver_opts=None, dtype=np.float64,
+                    check_every=1, warm_start=True, gap_tol=None, gap_every=10, relax=1.0, accel=False, anderson=0,
+                    update_rho_fn=None, verbose=False):
+    """
+    Solve LASSO for every lam in lams (best given in decreasing order).
+
+    A^T b and the x-update factorization are computed once for the whole
+    path; with warm_start each solve starts from the previous x, z, y and
+    final rho.
+
+    Returns (coefs, iters, rhos): coefs[i] is the (sparse) z-iterate for
+    lams[i], iters[i] the ADMM iterations it took and rhos[i] its final rho.
+    """
+    m, d = A.shape
+    A = as_dtype(A, dtype)
+    Atb = rmatvec(A, b).astype(dtype, copy=False);
+    btb = float(b @ b)
+    xsolver = make_x_solver(A, solver, **(solver_opts or {}))
+
+    coefs = np.zeros((len(lams), d), dtype)
+    n_iters = np.zeros(len(lams), dtype=int)
+    rhos = np.zeros(len(lams))
+
+    x, z, y, rho = np.zeros(d, dtype), np.zeros(d, dtype), np.zeros(d, dtype), float(rho0)
+    for i, lam in enumerate(lams):
+        if not warm_start:
+            x, z, y, rho = np.zeros(d, dtype), np.zeros(d, dtype), np.zeros(d, dtype), float(rho0)
+
+        state, _ = _admm_lasso_iterate(xsolver, Atb, lam, x, z, y, rho, iters=iters,
+                                       abstol=abstol, reltol=reltol, mu=mu, c=c, p=p,
+                                       check_every=check_every, btb=btb, gap_tol=gap_tol,
+                                       gap_every=gap_every, relax=relax, accel=accel, anderson=anderson,
+                                       update_rho_fn=update_rho_fn, verbose=False)
+        x, z, y, rho = state["x"], state["z"], state["y"], state["rho"]
+        coefs[i] = z
+        n_iters[i] = state["iters"]
+        rhos[i] = rho
+
+        if verbose:
+            print(f"lam={lam:.3e} iters={state['iters']:4d} nnz={np.count_nonzero(z):4d} rho={rho:.2e}")
+
+    return coefs, n_iters, rhos
+
+
+def admm_lasso_out_of_core(A, b, lam, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
+                           mu=3.0, c=1.0, p=1.2, solver="eig", chunk_rows=None, dtype=np.float64,
+                           check_every=1, gap_tol=None, gap_every=10, relax=1.0, accel=False, anderson=0,
+                           update_rho_fn=None, verbose=True):
+    # A, b may be np.memmap arrays or .npy paths far larger than RAM; only
+    # row chunks are read to build A^T A and A^T b, and the iteration then
+    # runs on the d x d Gram data ("eig", "chol" or "direct")
+    solver = resolve_gram_solver(solver)
+    AtA, Atb, btb = accumulate_gram(A, b, chunk_rows=chunk_rows)
+    d = Atb.shape[0]
+    xsolver = make_x_solver(None, solver, AtA=AtA.astype(dtype, copy=False))
+    Atb = Atb.astype(dtype, copy=False)
+
+    x, z, y = np.zeros(d, dtype), np.zeros(d, dtype), np.zeros(d, dtype)
+    state, hist = _admm_lasso_iterate(xsolver, Atb, lam, x, z, y, float(rho0), iters=iters,
+                                      abstol=abstol, reltol=reltol, mu=mu, c=c, p=p,
+                                      check_every=check_every, btb=btb, gap_tol=gap_tol,
+                                      gap_every=gap_every, relax=relax, accel=accel, anderson=anderson,
+                                      update_rho_fn=update_rho_fn, verbose=verbose)
+    return state["z"], hist
+
+
+def gap_safe_screen(AtA, Atb, btb, lam, z, active, norms):
+    """
+    Gap-safe sphere test (Fercoq, Gramfort & Salmon) from Gram data.
+
+    z holds the primal iterate on the `active` features (zero elsewhere).
+    Returns (keep, gap): keep is a mask over `active` of the features that
+    may still be nonzero at the optimum, gap the duality gap at z.
+    """
+    g = Atb - AtA[:, active] @ z  # A^T (b - A z), all features
+    gap, alpha = lasso_duality_gap(z, Atb[active], g[active], btb, lam, g_inf=np.max(np.abs(g)))
+
+    radius = np.sqrt(2.0 * gap) / lam
+    keep = alpha * np.abs(g[active]) + radius * norms[active] >= 1.0
+    return keep, gap
+
+
+class _ActiveSetRule:
+    # update rule seen through a reduced active set: no reset per chunk, and
+    # observe() gets the iterates scattered back to full length
+    def __init__(self, rule, d):
+        self.rule = rule
+        self.d = d
+        self.active = None
+        if hasattr(rule, "observe"):
+            self.observe = self._observe
+
+    def __call__(self, *args, **kwargs):
+        return self.rule(*args, **kwargs)
+
+    def _observe(self, k, *vectors):
+        full = []
+        for v in vectors:
+            f = np.zeros(self.d)
+            f[self.active] = v
+            full.append(f)
+        self.rule.observe(k, *full)
+
+
+def admm_lasso_screened(A, b, lam, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
+                        mu=3.0, c=1.0, p=1.2, solver="eig", screen_every=10, strong=False,
+                        kkt_tol=1e-3, chunk_rows=None, update_rho_fn=None, verbose=True):
+    """
+    LASSO ADMM on a shrinking active set.
+
+    Every screen_every iterations the gap-safe test drops features that are
+    provably zero at the optimum, and the iteration continues on the
+    reduced A^T A submatrix (re-factored for the x-update). strong=True
+    additionally starts from the strong-rule set |A_j^T b| >= 2 lam - lam_max,
+    which is not safe on its own. On convergence the full gradient is
+    checked against the KKT conditions; violators are put back and the
+    iteration resumes.
+
+    A, b may be arrays, memmaps or .npy paths (Gram data is built with
+    accumulate_gram). Returns (z, hist, active): the full-length solution,
+    the usual (rho, r, s, mode) history and the final active indices.
+
+    update_rho_fn replaces the module-level update_rho; a stateful rule is
+    reset once per solve and observes full-length iterates (zero off the
+    active set).
+    """
+    solver = resolve_gram_solver(solver)
+    AtA, Atb, btb = accumulate_gram(A, b, chunk_rows=chunk_rows)
+    d = Atb.shape[0]
+    norms = np.sqrt(np.diag(AtA))
+
+    active = np.arange(d)
+    if strong:
+        lam_max = np.max(np.abs(Atb))
+        active = np.flatnonzero(np.abs(Atb) >= 2.0 * lam - lam_max)
+
+    X, Z, Y = np.zeros(d), np.zeros(d), np.zeros(d)
+    rho = float(rho0)
+    rule = _ActiveSetRule(update_rho if update_rho_fn is None else update_rho_fn, d)
+    if hasattr(rule.rule, "reset"):
+        rule.rule.reset()
+    hists = []
+    xsolver, factored = None, None
+    k = 0
+    while k < iters:
+        if factored is None or not np.array_equal(factored, active):
+            xsolver = make_x_solver(None, solver, AtA=AtA[np.ix_(active, active)])
+            factored = active
+        rule.active = active
+
+        state, hist = _admm_lasso_iterate(xsolver, Atb[active], lam, X[active], Z[active], Y[active], rho,
+                                          iters=min(screen_every, iters - k), abstol=abstol, reltol=reltol,
+                                          mu=mu, c=c, p=p, k0=k, n_full=d, update_rho_fn=rule,
+                                          verbose=False)
+        X[active], Z[active], Y[active] = state["x"], state["z"], state["y"]
+        rho = state["rho"]
+        k += state["iters"]
+        hists.append(hist)
+
+        if state["converged"]:
+            # KKT on the full problem: |A_j^T (b - A z)| <= lam for every j off the active set
+            g = Atb - AtA[:, active] @ Z[active]
+            off = np.ones(d, dtype=bool)
+            off[active] = False
+            violators = np.flatnonzero(off & (np.abs(g) > lam * (1.0 + kkt_tol)))
+            if verbose:
+                print(f"k={k:4d} converged on {active.size} features, {violators.size} KKT violators")
+            if violators.size == 0:
+                break
+            active = np.union1d(active, violators)
+            continue
+
+        keep, gap = gap_safe_screen(AtA, Atb, btb, lam, Z[active], active, norms)
+        dropped = active[~keep]
+        X[dropped], Z[dropped], Y[dropped] = 0.0, 0.0, 0.0
+        active = active[keep]
+        if verbose:
+            print(f"k={k:4d} gap={gap:.2e} active={active.size}")
+
+    hist = (np.concatenate([h[0] for h in hists]), np.concatenate([h[1] for h in hists]),
+            np.concatenate([h[2] for h in hists]), [mode for h in hists for mode in h[3]])
+    return Z, hist, active
+
+
+def _consensus_worker(conn, A_i, b_i, solver, solver_opts):
+    # owns one row block: factor once, then answer x-update requests
+    # (v, rho) -> argmin 1/2 ||A_i x - b_i||^2 + rho/2 ||x||^2 - v^T x
+    A_i, b_i = np.asarray(load_rows(A_i)), np.asarray(load_rows(b_i))
+    Atb_i = A_i.T @ b_i
+    if solver == "auto":
+        # both factor once and stay valid for every rho
+        solver = "woodbury" if A_i.shape[0] < A_i.shape[1] else "eig"
+    xsolver = make_x_solver(A_i, solver, **(solver_opts or {}))
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        v, rho = msg
+        conn.send(xsolver.solve(Atb_i + v, rho))
+    conn.close()
+
+
+def admm_lasso_consensus(A, b, lam, n_blocks=None, rho0=1.0, iters=2000, abstol=1e-4, reltol=1e-3,
+                         mu=3.0, c=1.0, p=1.2, solver="auto", solver_opts=None, update_rho_fn=None,
+                         verbose=True):
+    """
+    Global-consensus ADMM for LASSO with A, b split into row blocks.
+
+    Each block lives in its own worker process with its own cached x-update
+    factorization (solver="auto": "eig" for tall blocks, "woodbury" for fat
+    ones); per iteration only d-vectors travel (rho z - y_i out, x_i back).
+    The z / y consensus step and the adaptive update_rho run in this process.
+
+    A may also be given as a list of row blocks (with b a matching list).
+    Blocks given as .npy paths are loaded by their worker only, so the full
+    matrix never has to exist in one process.
+
+    update_rho_fn replaces the module-level update_rho; a stateful rule is
+    reset once and observes the block-averaged x and y, z and the dual
+    residual vector rho (z_k - z_{k-1}).
+
+    Returns (z, (rho_hist, r_hist, s_hist, mode_hist)).
+    """
+    if isinstance(A, (list, tuple)):
+        A_blocks, b_blocks = list(A), list(b)
+    else:
+        n_blocks = n_blocks or os.cpu_count() or 1
+        A_blocks = np.array_split(A, n_blocks)
+        b_blocks = np.array_split(b, n_blocks)
+    N = len(A_blocks)
+    d = load_rows(A_blocks[0]).shape[1]
+
+    workers, conns = [], []
+    for A_i, b_i in zip(A_blocks, b_blocks):
+        parent_conn, child_conn = mp.Pipe()
+        proc = mp.Process(target=_consensus_worker, args=(child_conn, A_i, b_i, solver, solver_opts), daemon=True)
+        proc.start()
+        child_conn.close()
+        workers.append(proc)
+        conns.append(parent_conn)
+
+    xs = np.zeros((N, d))
+    ys = np.zeros((N, d))
+    z = np.zeros(d)
+    rho = float(rho0)
+    rule = update_rho if update_rho_fn is None else update_rho_fn
+    if hasattr(rule, "reset"):
+        rule.reset()
+    observe = getattr(rule, "observe", None)
+
+    r_hist, s_hist, rho_hist, mode_hist = [], [], [], []
+    cnt = {"mul": 0, "div": 0, "keep": 0}
+
+    def worker_failed(i):
+        workers[i].join(timeout=5)
+        return RuntimeError(f"consensus worker {i} (row block {i} of {N}) died with exit code {workers[i].exitcode}; its traceback is on stderr")
+
+    try:
+        for k in range(iters):
+            for i, (conn, y_i) in enumerate(zip(conns, ys)):
+                try:
+                    conn.send((rho * z - y_i, rho))
+                except OSError:
+                    raise worker_failed(i) from None
+            for i, conn in enumerate(conns):
+                try:
+                    xs[i] = conn.recv()
+                except (EOFError, OSError):
+                    raise worker_failed(i) from None
+
+            z_old = z
+            z = soft(xs.mean(axis=0) + ys.mean(axis=0) / rho, lam / (N * rho))
+
+            R = xs - z
+            ys += rho * R
+
+            r_norm = float(np.linalg.norm(R))
+            s_norm = float(rho * np.sqrt(N) * np.linalg.norm(z - z_old))
+            r_hist.append(r_norm)
+            s_hist.append(s_norm)
+            rho_hist.append(rho)
+
+            # stopping (Boyd, consensus form)
+            eps_pri = np.sqrt(N * d) * abstol + reltol * max(np.linalg.norm(xs), np.sqrt(N) * np.linalg.norm(z))
+            eps_dual = np.sqrt(N * d) * abstol + reltol * (np.linalg.norm(ys) / rho)
+            if r_norm <= eps_pri and s_norm <= eps_dual:
+                break
+
+            if observe is not None:
+                observe(k, xs.mean(axis=0), z, ys.mean(axis=0), rho * (z - z_old))
+            rho, t, mode = rule(rho, k, r_norm, s_norm, mu=mu, c=c, p=p)
+            cnt[mode] += 1
+            mode_hist.append(mode)
+
+            if verbose and k % 50 == 0:
+                print(f"k={k:4d} r={r_norm:.2e} s={s_norm:.2e} rho={rho_hist[-1]:.2e} -> {rho:.2e} ({mode}, tau={t:.2e})")
+    finally:
+        for conn, proc in zip(conns, workers):
+            try:
+                conn.send(None)
+            except OSError:  # the worker is already gone
+                pass
+            conn.close()
+            proc.join()
 
     if verbose:
         print("rho update counts:", cnt)
 
-    return np.array(rho_hist), np.array(r_hist), np.array(s_hist), mode_hist
+    return z, (np.array(rho_hist), np.array(r_hist), np.array(s_hist), mode_hist)
 
 
 def demo_and_plot():